@@ -20,7 +20,8 @@ def main():
         method=args.method,
         tpms_file=args.tpms_file,
         programs_file=args.programs_file,
-        verbose=args.verbose
+        verbose=args.verbose,
+        max_rows=args.max_rows
     )
 
 
@@ -11,7 +11,6 @@ setup(
         "pandas>=2.2.3",
         "PuLP>=2.9.0",
         "python-dateutil>=2.9.0",
-        "pytz>=2024.2",
         "six>=1.17.0",
         "tzdata>=2025.1",
     ],
@@ -20,13 +19,16 @@ setup(
             "pytest>=7.4.4",
             "pytest-cov>=4.1.0",
         ],
+        "jit": [
+            "numba>=0.61.0",
+        ],
     },
     entry_points={
         'console_scripts': [
             'tpm-optimizer=tpm_optimizer.cli.commands:main',
         ],
     },
-    python_requires=">=3.8",
+    python_requires=">=3.10",
     author="Your Name",
     author_email="your.email@example.com",
     description="TPM Assignment Optimizer",
@@ -37,8 +39,6 @@ setup(
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.8",
-        "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
     ],
 )
\ No newline at end of file
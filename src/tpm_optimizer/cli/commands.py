@@ -1,7 +1,7 @@
 from typing import Dict, Optional
 import sys
 from ..models import TPM, Program
-from ..utils import load_data, DataValidator
+from ..utils import load_data
 from ..optimizers import (
     MILPOptimizer,
     SimulatedAnnealingOptimizer,
@@ -15,24 +15,17 @@ def run_optimization(
         method: str,
         tpms_file: str = 'tpms.csv',
         programs_file: str = 'programs.csv',
-        verbose: bool = False
+        verbose: bool = False,
+        max_rows: Optional[int] = None
 ) -> Optional[Dict[str, str]]:
     """Run the optimization process"""
     try:
         # Load data
         if verbose:
             print("Loading data...")
+        # load_data validates every row and raises on invalid data
         tpms, programs = load_data(tpms_file, programs_file)
 
-        # Validate data
-        if verbose:
-            print("Validating data...")
-        validator = DataValidator()
-        for tpm in tpms.values():
-            validator.validate_tpm(tpm)
-        for program in programs.values():
-            validator.validate_program(program)
-
         # Select optimizer
         optimizer_class = {
             'milp': MILPOptimizer,
@@ -41,7 +34,7 @@ def run_optimization(
             'two-phase': TwoPhaseOptimizer
         }[method]
 
-        optimizer = optimizer_class(tpms, programs)
+        optimizer = optimizer_class(tpms, programs, verbose=verbose)
 
         # Run optimization
         if verbose:
@@ -62,7 +55,8 @@ def run_optimization(
             utilization_df,
             metrics,
             total_programs=len(programs),
-            total_assignments=len(assignments)
+            total_assignments=len(assignments),
+            max_rows=max_rows
         )
 
         return assignments
@@ -24,6 +24,13 @@ def create_parser() -> argparse.ArgumentParser:
         help='Path to Programs CSV file'
     )
 
+    parser.add_argument(
+        '--max-rows',
+        type=int,
+        default=None,
+        help='Truncate printed tables longer than this many rows (default: print all rows)'
+    )
+
     parser.add_argument(
         '--verbose',
         action='store_true',
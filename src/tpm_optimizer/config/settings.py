@@ -1,9 +1,16 @@
 # src/tpm_optimizer/config/settings.py
-from dataclasses import dataclass
-from typing import Dict
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping
+import numpy as np
 
+# Default scoring weights in the order of the assignment score components
+# (timezone, skill, level, portfolio, preference)
+WEIGHTS_VEC = np.array([0.3, 0.25, 0.2, 0.15, 0.1], dtype=np.float64)
+WEIGHTS_VEC.setflags(write=False)
 
-@dataclass
+
+@dataclass(frozen=True)
 class OptimizationSettings:
     # Simulated Annealing parameters
     INITIAL_TEMPERATURE: float = 1.0
@@ -14,15 +21,22 @@ class OptimizationSettings:
     # Hybrid optimizer parameters
     MAX_RUNTIME: int = 300  # 5 minutes
     NO_IMPROVEMENT_LIMIT: int = 1000
+    # Limits are checked after every SWEEP_ACCEPT_FACTOR * N accepted moves
+    # (N = programs)
+    SWEEP_ACCEPT_FACTOR: float = 0.1
+
+    # MILP solver parameters (CBC stops within MILP_GAP_REL of the optimum)
+    MILP_TIME_LIMIT: int = 60
+    MILP_GAP_REL: float = 0.01
 
     # Scoring weights
-    WEIGHTS: Dict[str, float] = {
+    WEIGHTS: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({
         'timezone': 0.3,
         'skill': 0.25,
         'level': 0.2,
         'portfolio': 0.15,
         'preference': 0.1
-    }
+    }))
 
     # Load targets
     TARGET_UTILIZATION: float = 0.85
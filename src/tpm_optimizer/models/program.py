@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from typing import Set
 
 
-@dataclass
+@dataclass(slots=True)
 class Program:
     id: str
     name: str
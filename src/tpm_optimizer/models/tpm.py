@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from typing import Set, List
 
 
-@dataclass
+@dataclass(slots=True)
 class TPM:
     id: str
     name: str
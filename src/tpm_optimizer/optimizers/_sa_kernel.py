@@ -0,0 +1,515 @@
+"""Array kernels for the annealing loops of the hybrid and simulated annealing optimizers.
+
+The functions operate only on the integer/float arrays built by BaseOptimizer
+(an assignment is an int array of TPM indices per program, -1 = unassigned).
+They are compiled with numba when it is installed and run as plain Python
+otherwise. Compiled kernels are cached on disk (cache=True), so only the
+first run after a change pays the compile time.
+"""
+from dataclasses import dataclass
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+MAX_NEIGHBOR_ATTEMPTS = 50
+
+
+def candidate_lists(mask):
+    """Compressed rows of a programs x TPMs candidate mask.
+
+    Returns (offsets, tpms): the candidate TPMs of program p are
+    tpms[offsets[p]:offsets[p + 1]].
+    """
+    offsets = np.zeros(mask.shape[0] + 1, dtype=np.int64)
+    np.cumsum(mask.sum(axis=1), out=offsets[1:])
+    return offsets, np.nonzero(mask)[1].astype(np.int64)
+
+
+@njit(cache=True)
+def evaluate_objectives(assign, req_time, available, allow_overload,
+                        tz_violation, portfolio, n_portfolios):
+    """Compute the Pareto metrics of an assignment, ordered as solution.METRIC_NAMES"""
+    n_tpms = available.shape[0]
+    load = np.zeros(n_tpms)
+    used = np.zeros(n_tpms, dtype=np.int64)
+    members = np.zeros((n_tpms, n_portfolios), dtype=np.int64)
+    metrics = np.zeros(4)
+
+    for p in range(assign.shape[0]):
+        t = assign[p]
+        if t < 0:
+            continue
+        load[t] += req_time[p]
+        used[t] += 1
+        members[t, portfolio[p]] += 1
+        if tz_violation[t, p]:
+            metrics[2] += 1
+
+    for t in range(n_tpms):
+        if used[t] == 0:
+            metrics[0] += 1
+        if not allow_overload[t] and load[t] > available[t]:
+            metrics[1] += 1
+        n_assigned_portfolios = 0
+        for f in range(n_portfolios):
+            if members[t, f] > 0:
+                n_assigned_portfolios += 1
+        if n_assigned_portfolios > 2:
+            metrics[3] += 1
+
+    return metrics
+
+
+@njit(cache=True)
+def dominates(a, b):
+    """Returns True if metrics a Pareto-dominate metrics b"""
+    better = 0
+    worse = 0
+    for k in range(a.shape[0]):
+        better += a[k] < b[k]
+        worse += a[k] > b[k]
+    return better > 0 and worse == 0
+
+
+@njit(cache=True)
+def build_state(assign, req_time, n_tpms, portfolio, n_portfolios):
+    """Per-TPM loads, program counts and portfolio membership of an assignment"""
+    load = np.zeros(n_tpms)
+    used = np.zeros(n_tpms, dtype=np.int64)
+    members = np.zeros((n_tpms, n_portfolios), dtype=np.int64)
+    portfolio_count = np.zeros(n_tpms, dtype=np.int64)
+    for p in range(assign.shape[0]):
+        t = assign[p]
+        if t < 0:
+            continue
+        load[t] += req_time[p]
+        used[t] += 1
+        if members[t, portfolio[p]] == 0:
+            portfolio_count[t] += 1
+        members[t, portfolio[p]] += 1
+    return load, used, members, portfolio_count
+
+
+@njit(cache=True)
+def _add_tpm_metrics(t, sign, metrics, load, used, portfolio_count, available, allow_overload):
+    """Add (sign=1) or remove (sign=-1) TPM t's contribution to the metrics"""
+    if used[t] == 0:
+        metrics[0] += sign
+    if not allow_overload[t] and load[t] > available[t]:
+        metrics[1] += sign
+    if portfolio_count[t] > 2:
+        metrics[3] += sign
+
+
+@njit(cache=True)
+def move(assign, p, t_new, metrics, load, used, members, portfolio_count,
+         req_time, available, allow_overload, tz_violation, portfolio):
+    """Reassign program p to TPM t_new, updating only the two affected TPMs"""
+    t_old = assign[p]
+    if t_old == t_new:
+        return
+    f = portfolio[p]
+    if t_old >= 0:
+        _add_tpm_metrics(t_old, -1, metrics, load, used, portfolio_count, available, allow_overload)
+        load[t_old] -= req_time[p]
+        used[t_old] -= 1
+        members[t_old, f] -= 1
+        if members[t_old, f] == 0:
+            portfolio_count[t_old] -= 1
+        if tz_violation[t_old, p]:
+            metrics[2] -= 1
+        _add_tpm_metrics(t_old, 1, metrics, load, used, portfolio_count, available, allow_overload)
+    if t_new >= 0:
+        _add_tpm_metrics(t_new, -1, metrics, load, used, portfolio_count, available, allow_overload)
+        load[t_new] += req_time[p]
+        used[t_new] += 1
+        if members[t_new, f] == 0:
+            portfolio_count[t_new] += 1
+        members[t_new, f] += 1
+        if tz_violation[t_new, p]:
+            metrics[2] += 1
+        _add_tpm_metrics(t_new, 1, metrics, load, used, portfolio_count, available, allow_overload)
+    assign[p] = t_new
+
+
+@njit(cache=True)
+def assign_deltas(p, tpms, assign, metrics, load, used, members, portfolio_count,
+                  req_time, available, allow_overload, tz_violation, portfolio):
+    """Metric changes from moving program p to each of the given TPMs"""
+    deltas = np.zeros((tpms.shape[0], metrics.shape[0]))
+    base = metrics.copy()
+    t_old = assign[p]
+    for k in range(tpms.shape[0]):
+        t = tpms[k]
+        saved_load = load[t]
+        move(assign, p, t, metrics, load, used, members, portfolio_count,
+             req_time, available, allow_overload, tz_violation, portfolio)
+        deltas[k] = metrics - base
+        move(assign, p, t_old, metrics, load, used, members, portfolio_count,
+             req_time, available, allow_overload, tz_violation, portfolio)
+        # Adding and subtracting a time need not round-trip exactly
+        load[t] = saved_load
+        metrics[:] = base
+    return deltas
+
+
+@njit(cache=True)
+def _record(undo, saved, row, p, t_prev, t_touched, load, metrics):
+    """Log a move and the state it overwrites so undo_moves can restore it exactly"""
+    undo[row, 0], undo[row, 1], undo[row, 2] = p, t_prev, t_touched
+    saved[row] = load[t_touched]
+    saved[2:] = metrics
+
+
+@njit(cache=True)
+def propose_moves(assign, metrics, load, used, members, portfolio_count,
+                  req_time, available, allow_overload, tz_violation, portfolio,
+                  movable, candidate_offsets, candidate_tpms, undo, saved, rng):
+    """Apply a feasible swap or reassignment of movable programs in place.
+
+    Each move is logged in undo as a (program, previous TPM, touched TPM) row,
+    with the touched TPMs' previous loads followed by the previous metrics in
+    saved. Random choices are drawn from the NumPy Generator rng. Returns the
+    number of moves (0 if no feasible neighbor was found).
+    """
+    n_movable = movable.shape[0]
+    if n_movable < 1:
+        return 0
+
+    for _ in range(MAX_NEIGHBOR_ATTEMPTS):
+        if rng.random() < 0.5 and n_movable >= 2:
+            # Try swapping
+            i = rng.integers(0, n_movable)
+            j = rng.integers(0, n_movable - 1)
+            if j >= i:
+                j += 1
+            p1, p2 = movable[i], movable[j]
+            t1, t2 = assign[p1], assign[p2]
+            _record(undo, saved, 0, p1, t1, t1, load, metrics)
+            _record(undo, saved, 1, p2, t2, t2, load, metrics)
+            n_moves = 2
+            move(assign, p1, t2, metrics, load, used, members, portfolio_count,
+                 req_time, available, allow_overload, tz_violation, portfolio)
+            move(assign, p2, t1, metrics, load, used, members, portfolio_count,
+                 req_time, available, allow_overload, tz_violation, portfolio)
+        else:
+            # Try reassignment
+            p = movable[rng.integers(0, n_movable)]
+            start, end = candidate_offsets[p], candidate_offsets[p + 1]
+            if end == start:
+                continue
+            t = candidate_tpms[start + rng.integers(0, end - start)]
+            _record(undo, saved, 0, p, assign[p], assign[p], load, metrics)
+            _record(undo, saved, 1, -1, -1, t, load, metrics)
+            n_moves = 1
+            move(assign, p, t, metrics, load, used, members, portfolio_count,
+                 req_time, available, allow_overload, tz_violation, portfolio)
+
+        if metrics[1] == 0:  # No TPM over capacity
+            return n_moves
+        undo_moves(undo, saved, n_moves, assign, metrics, load, used, members, portfolio_count,
+                   req_time, available, allow_overload, tz_violation, portfolio)
+
+    return 0
+
+
+@njit(cache=True)
+def undo_moves(undo, saved, n_moves, assign, metrics, load, used, members, portfolio_count,
+               req_time, available, allow_overload, tz_violation, portfolio):
+    """Revert the moves recorded by propose_moves"""
+    if n_moves == 0:
+        return
+    for k in range(n_moves - 1, -1, -1):
+        move(assign, undo[k, 0], undo[k, 1], metrics, load, used, members, portfolio_count,
+             req_time, available, allow_overload, tz_violation, portfolio)
+    for k in range(2):
+        load[undo[k, 2]] = saved[k]
+    metrics[:] = saved[2:]
+
+
+@njit(cache=True)
+def sa_sweep(current, current_metrics, load, used, members, portfolio_count,
+             best, best_metrics,
+             req_time, available, allow_overload, tz_violation, portfolio,
+             movable, candidate_offsets, candidate_tpms, max_accepted,
+             iteration, max_iterations, no_improvement_count, no_improvement_limit, rng):
+    """Run annealing iterations until max_accepted moves were accepted.
+
+    Every proposed neighbor is kept: the Pareto acceptance rule, exp(k / T)
+    for a neighbor improving k metrics, is never below 1 and so never
+    rejects. current, its metrics and per-TPM state, best and best_metrics
+    are updated in place. Returns the new (iteration, no_improvement_count,
+    best_improved).
+    """
+    best_improved = False
+    previous_metrics = current_metrics.copy()
+    undo = np.zeros((2, 3), dtype=np.int64)
+    saved = np.zeros(2 + current_metrics.shape[0])
+    accepted = 0
+    while (accepted < max_accepted and iteration < max_iterations and
+           no_improvement_count < no_improvement_limit):
+        previous_metrics[:] = current_metrics
+        n_moves = propose_moves(current, current_metrics, load, used, members, portfolio_count,
+                                req_time, available, allow_overload, tz_violation, portfolio,
+                                movable, candidate_offsets, candidate_tpms, undo, saved, rng)
+
+        # Accept if neighbor dominates current
+        if dominates(current_metrics, previous_metrics):
+            accepted += 1
+            if dominates(current_metrics, best_metrics):
+                best[:] = current
+                best_metrics[:] = current_metrics
+                no_improvement_count = 0
+                best_improved = True
+        elif n_moves > 0:
+            accepted += 1
+
+        iteration += 1
+        no_improvement_count += 1
+
+    return iteration, no_improvement_count, best_improved
+
+
+@njit(cache=True)
+def relocate(p, t_new, assign, rank, members, n_members):
+    """Reassign program p to TPM t_new, keeping each TPM's members sorted by rank"""
+    t_old = assign[p]
+    if t_old >= 0:
+        k = 0
+        while members[t_old, k] != p:
+            k += 1
+        n_members[t_old] -= 1
+        for i in range(k, n_members[t_old]):
+            members[t_old, i] = members[t_old, i + 1]
+    if t_new >= 0:
+        k = n_members[t_new]
+        while k > 0 and rank[members[t_new, k - 1]] > rank[p]:
+            members[t_new, k] = members[t_new, k - 1]
+            k -= 1
+        members[t_new, k] = p
+        n_members[t_new] += 1
+    assign[p] = t_new
+
+
+@njit(cache=True)
+def refresh_tpm(t, members, n_members, contribution, n_invalid, used, overloaded,
+                req_time, available, allow_overload, pair_scores, tz_violation,
+                portfolio, n_portfolios):
+    """Recompute TPM t's share of SimulatedAnnealingOptimizer's solution score.
+
+    Members are visited in rank order, which fixes the running load sums
+    that capacity violations are measured against.
+    """
+    seen = np.zeros(n_portfolios, dtype=np.bool_)
+    n_assigned_portfolios = 0
+    load = 0.0
+    assignment_score = 0.0
+    capacity_violations = 0.0
+    timezone_violations = 0
+    invalid = 0
+    n_programs = n_members[t]
+    for k in range(n_programs):
+        p = members[t, k]
+        load += req_time[p]
+        if not allow_overload[t] and load > available[t]:
+            capacity_violations += (load - available[t]) * 100
+        if pair_scores[p, t] == -np.inf:
+            invalid += 1
+        else:
+            assignment_score += pair_scores[p, t]
+        if tz_violation[t, p]:
+            timezone_violations += 1
+        if not seen[portfolio[p]]:
+            seen[portfolio[p]] = True
+            n_assigned_portfolios += 1
+
+    portfolio_violations = n_programs if n_assigned_portfolios > 2 else 0
+
+    underutilization_penalty = 0.0
+    if n_programs > 0:  # Only penalize TPMs that are being used
+        utilization = load / available[t]
+        if utilization < 0.7:
+            underutilization_penalty += (0.7 - utilization) * 5.0
+            if utilization < 0.5:  # Severe underutilization
+                underutilization_penalty += (0.5 - utilization) * 10.0
+
+    contribution[t] = assignment_score - (portfolio_violations * 2.0 +
+                                          timezone_violations * 1.5 +
+                                          capacity_violations * 10.0 +
+                                          underutilization_penalty)
+    n_invalid[t] = invalid
+    used[t] = n_programs > 0
+    overloaded[t] = not allow_overload[t] and load > available[t]
+
+
+@njit(cache=True)
+def solution_score(contribution, n_invalid, used, overloaded):
+    """Total score from the per-TPM shares kept by refresh_tpm"""
+    return _total_score(contribution, n_invalid.sum(), used.shape[0] - used.sum(),
+                        overloaded.sum())
+
+
+@njit(cache=True)
+def _total_score(contribution, invalid_pairs, unused_tpms, overloaded_tpms):
+    """solution_score from the TPM counts, which anneal keeps up to date"""
+    if invalid_pairs > 0:
+        return -np.inf
+    # Summed in TPM order so compiled and pure Python runs agree exactly
+    total_score = 0.0
+    for t in range(contribution.shape[0]):
+        total_score += contribution[t]
+    # Penalize unused TPMs when they could take work
+    if unused_tpms > 0 and overloaded_tpms > 0:
+        total_score -= unused_tpms * overloaded_tpms * 5.0
+    return total_score
+
+
+@njit(cache=True)
+def anneal(assign, rank, members, n_members, contribution, n_invalid, used, overloaded,
+           req_time, available, allow_overload, pair_scores, tz_violation,
+           portfolio, n_portfolios, movable, candidate_offsets, candidate_tpms,
+           current_score, best, best_score, inverse_temperatures, iteration, stop, rng):
+    """Run SimulatedAnnealingOptimizer iterations until iteration reaches stop.
+
+    Each iteration swaps two movable programs or reassigns one to a random
+    candidate TPM, then applies the Metropolis rule at the temperature
+    1 / inverse_temperatures[iteration]. assign, its per-TPM shares and best
+    are updated in place. Returns the new (current_score, best_score, iteration).
+    """
+    n_movable = movable.shape[0]
+    touched = np.zeros(2, dtype=np.int64)
+    saved_contribution = np.zeros(2)
+    saved_invalid = np.zeros(2, dtype=np.int64)
+    saved_used = np.zeros(2, dtype=np.bool_)
+    saved_overloaded = np.zeros(2, dtype=np.bool_)
+    invalid_pairs = n_invalid.sum()
+    unused_tpms = used.shape[0] - used.sum()
+    overloaded_tpms = overloaded.sum()
+    while iteration < stop:
+        p1, p2, t1, t2 = -1, -1, -1, -1
+        if n_movable >= 1:
+            if rng.random() < 0.5 and n_movable >= 2:
+                # Swap two non-fixed assignments
+                i = rng.integers(0, n_movable)
+                j = rng.integers(0, n_movable - 1)
+                if j >= i:
+                    j += 1
+                p1, p2 = movable[i], movable[j]
+                t1, t2 = assign[p1], assign[p2]
+            else:
+                # Change single non-fixed assignment
+                p1 = movable[rng.integers(0, n_movable)]
+                start, end = candidate_offsets[p1], candidate_offsets[p1 + 1]
+                if end > start:
+                    t1 = assign[p1]
+                    t2 = candidate_tpms[start + rng.integers(0, end - start)]
+
+        changed = t1 >= 0 and t1 != t2
+        if changed and (pair_scores[p1, t2] == -np.inf or
+                        (p2 >= 0 and pair_scores[p2, t1] == -np.inf)):
+            # An invalid pair makes the neighbor score -inf, which is never
+            # accepted; skip scoring it but keep the acceptance draw
+            rng.random()
+            iteration += 1
+            continue
+
+        saved_counts = invalid_pairs, unused_tpms, overloaded_tpms
+        if changed:
+            touched[0], touched[1] = t1, t2
+            for k in range(2):
+                t = touched[k]
+                saved_contribution[k] = contribution[t]
+                saved_invalid[k] = n_invalid[t]
+                saved_used[k] = used[t]
+                saved_overloaded[k] = overloaded[t]
+            relocate(p1, t2, assign, rank, members, n_members)
+            if p2 >= 0:
+                relocate(p2, t1, assign, rank, members, n_members)
+            for k in range(2):
+                t = touched[k]
+                refresh_tpm(t, members, n_members, contribution, n_invalid, used,
+                            overloaded, req_time, available, allow_overload, pair_scores,
+                            tz_violation, portfolio, n_portfolios)
+                invalid_pairs += n_invalid[t] - saved_invalid[k]
+                unused_tpms += int(saved_used[k]) - int(used[t])
+                overloaded_tpms += int(overloaded[t]) - int(saved_overloaded[k])
+        neighbor_score = _total_score(contribution, invalid_pairs, unused_tpms, overloaded_tpms)
+
+        if neighbor_score > current_score:
+            # Accept better solutions
+            current_score = neighbor_score
+            if current_score > best_score:
+                best[:] = assign
+                best_score = current_score
+        elif rng.random() < np.exp((neighbor_score - current_score) *
+                                   inverse_temperatures[iteration]):
+            # Accept worse solutions with probability based on temperature
+            current_score = neighbor_score
+        elif changed:
+            if p2 >= 0:
+                relocate(p2, t2, assign, rank, members, n_members)
+            relocate(p1, t1, assign, rank, members, n_members)
+            for k in range(1, -1, -1):
+                t = touched[k]
+                contribution[t] = saved_contribution[k]
+                n_invalid[t] = saved_invalid[k]
+                used[t] = saved_used[k]
+                overloaded[t] = saved_overloaded[k]
+            invalid_pairs, unused_tpms, overloaded_tpms = saved_counts
+
+        iteration += 1
+
+    return current_score, best_score, iteration
+
+
+@dataclass
+class MoveLog:
+    """Undo record of a neighbor move, as filled in by propose_moves"""
+    moves: np.ndarray
+    saved: np.ndarray
+    n_moves: int = 0
+
+    @classmethod
+    def empty(cls, n_metrics: int) -> 'MoveLog':
+        return cls(np.zeros((2, 3), dtype=np.int64), np.zeros(2 + n_metrics))
+
+
+@dataclass
+class IncrementalState:
+    """An assignment with its per-TPM aggregates and cached Pareto metrics.
+
+    sa_sweep keeps these in sync as moves are applied, so evaluating a neighbor
+    only touches the TPMs it changes.
+    """
+    assign: np.ndarray
+    metrics: np.ndarray
+    loads: np.ndarray
+    used: np.ndarray
+    portfolio_members: np.ndarray
+    portfolio_counts: np.ndarray
+
+    @classmethod
+    def build(cls, assign, req_time, available, allow_overload,
+              tz_violation, portfolio, n_portfolios) -> 'IncrementalState':
+        metrics = evaluate_objectives(assign, req_time, available, allow_overload,
+                                      tz_violation, portfolio, n_portfolios)
+        return cls(assign, metrics,
+                   *build_state(assign, req_time, available.shape[0], portfolio, n_portfolios))
+
+    def move(self, p, t, req_time, available, allow_overload, tz_violation, portfolio):
+        """Reassign program index p to TPM index t (-1 to unassign)"""
+        move(self.assign, p, t, self.metrics, self.loads, self.used, self.portfolio_members,
+             self.portfolio_counts, req_time, available, allow_overload, tz_violation, portfolio)
+
+    def delta_if_assign(self, p, tpms, req_time, available, allow_overload,
+                        tz_violation, portfolio) -> np.ndarray:
+        """Metric changes (one row per TPM index in tpms) of moving program p there"""
+        return assign_deltas(p, tpms, self.assign, self.metrics, self.loads, self.used,
+                             self.portfolio_members, self.portfolio_counts,
+                             req_time, available, allow_overload, tz_violation, portfolio)
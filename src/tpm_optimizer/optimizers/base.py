@@ -1,12 +1,18 @@
-from typing import Dict
+from typing import Dict, List, Tuple
+import numpy as np
+from ..config.settings import WEIGHTS_VEC
 from ..models import TPM, Program, TPMConstraints
-from ..utils.timezone import calculate_timezone_score, timezone_difference
+from ..utils.scoring import level_scores
+from ..utils.timezone import calculate_timezone_scores, program_utc_offset, utc_offsets
 
 
 class BaseOptimizer:
-    def __init__(self, tpms: Dict[str, TPM], programs: Dict[str, Program]):
+    def __init__(self, tpms: Dict[str, TPM], programs: Dict[str, Program],
+                 verbose: bool = False):
         self.tpms = tpms
         self.programs = programs
+        self.verbose = verbose  # Print progress and analysis output
+        self._build_index()
         self.assignments = {}
         # Validate and store fixed assignments
         self.fixed_assignments = {
@@ -15,32 +21,211 @@ class BaseOptimizer:
             if program.fixed_tpm and program.fixed_tpm.strip()
         }
 
+    @property
+    def assignments(self) -> Dict[str, str]:
+        return self._assignments
+
+    @assignments.setter
+    def assignments(self, assignments: Dict[str, str]):
+        """Replace the current assignments and rebuild the per-TPM state arrays"""
+        self._assignments = assignments
+        self._prog_tpm.fill(-1)
+        self._tpm_load.fill(0.0)
+        self._tpm_portfolio_count.fill(0)
+        self._tpm_portfolio_members.fill(0)
+        for prog_id, tpm_id in assignments.items():
+            p = self._prog_idx.get(prog_id)
+            t = self._tpm_idx.get(tpm_id)
+            if p is not None and t is not None:
+                self._apply(p, t)
+
+    def _build_index(self):
+        """Intern TPM, program and portfolio ids to contiguous indices and build
+        struct-of-arrays views of the static data and the per-TPM assignment state"""
+        self._tpm_ids = list(self.tpms)
+        self._prog_ids = list(self.programs)
+        self._tpm_idx = {tpm_id: i for i, tpm_id in enumerate(self._tpm_ids)}
+        self._prog_idx = {prog_id: j for j, prog_id in enumerate(self._prog_ids)}
+        self._portfolio_idx = {}
+        for program in self.programs.values():
+            self._portfolio_idx.setdefault(program.portfolio, len(self._portfolio_idx))
+
+        n_tpms, n_programs = len(self._tpm_ids), len(self._prog_ids)
+        tpms = self.tpms.values()
+        programs = self.programs.values()
+
+        self._available = np.array([tpm.available_time for tpm in tpms], dtype=np.float64)
+        self._allow_overload = np.array([tpm.allow_overload for tpm in tpms], dtype=bool)
+        self._level = np.array([tpm.level for tpm in tpms], dtype=np.int8)
+        self._req_time = np.array([p.required_time for p in programs], dtype=np.float64)
+        self._req_level = np.array([p.required_level for p in programs], dtype=np.int8)
+        self._complexity = np.array([p.complexity_score for p in programs], dtype=np.int32)
+        self._portfolio = np.array([self._portfolio_idx[p.portfolio] for p in programs],
+                                   dtype=np.int32)
+
+        self._req_skill_count = np.array([len(p.required_skills) for p in programs], dtype=np.int32)
+
+        # Pairwise lookups, computed once per (TPM, program) pair. Timezone
+        # differences stay float since some zones are offset by half hours.
+        self._conflicts = np.zeros((n_tpms, n_programs), dtype=bool)
+        self._desired = np.zeros((n_tpms, n_programs), dtype=bool)
+        for t, tpm in enumerate(tpms):
+            for prog_id in tpm.conflicts:
+                p = self._prog_idx.get(prog_id)
+                if p is not None:
+                    self._conflicts[t, p] = True
+            for prog_id in tpm.desired_programs:
+                p = self._prog_idx.get(prog_id)
+                if p is not None:
+                    self._desired[t, p] = True
+
+        # Skills as indicator matrices over the required-skill vocabulary, so
+        # the skill overlap of every pair is a single integer matrix product
+        skill_idx = {}
+        for program in programs:
+            for skill in program.required_skills:
+                skill_idx.setdefault(skill, len(skill_idx))
+        tpm_skills = np.zeros((n_tpms, len(skill_idx)), dtype=np.int32)
+        for t, tpm in enumerate(tpms):
+            tpm_skills[t, [skill_idx[s] for s in tpm.skills if s in skill_idx]] = 1
+        prog_skills = np.zeros((n_programs, len(skill_idx)), dtype=np.int32)
+        for p, program in enumerate(programs):
+            prog_skills[p, [skill_idx[s] for s in program.required_skills]] = 1
+        self._skill_overlap = tpm_skills @ prog_skills.T
+
+        # Timezones are resolved to UTC offsets once per TPM and program, then
+        # differenced by broadcasting
+        tpm_offset = utc_offsets([tpm.timezone for tpm in tpms])
+        prog_offset = utc_offsets([p.timezone for p in programs])
+        # Programs without timezones (None) become NaN
+        center = np.array([program_utc_offset(p) for p in programs], dtype=np.float64)
+        self._tz_diff = np.abs(tpm_offset[:, np.newaxis] - prog_offset[np.newaxis, :])
+        self._tz_score = calculate_timezone_scores(tpm_offset, center)
+
+        # Level fit of every (TPM, program) pair
+        self._level_score = level_scores(self._level[:, np.newaxis], self._req_level[np.newaxis, :])
+
+        # Program indices by complexity, then required time, largest first
+        self._complexity_order = np.lexsort((-self._req_time, -self._complexity))
+
+        # Level and conflict checks never change during a run (programs x TPMs)
+        self._static_ok = ((self._level[np.newaxis, :] >= self._req_level[:, np.newaxis]) &
+                           ~self._conflicts.T)
+
+        # Assignment state, maintained incrementally by _apply/_revert
+        self._prog_tpm = np.full(n_programs, -1, dtype=np.int32)
+        self._tpm_load = np.zeros(n_tpms, dtype=np.float64)
+        self._tpm_portfolio_count = np.zeros(n_tpms, dtype=np.int32)
+        self._tpm_portfolio_members = np.zeros((n_tpms, len(self._portfolio_idx)),
+                                               dtype=np.int32)
+
+    def _apply(self, p: int, t: int):
+        """Record program index p as assigned to TPM index t"""
+        f = self._portfolio[p]
+        self._prog_tpm[p] = t
+        self._tpm_load[t] += self._req_time[p]
+        if self._tpm_portfolio_members[t, f] == 0:
+            self._tpm_portfolio_count[t] += 1
+        self._tpm_portfolio_members[t, f] += 1
+
+    def _revert(self, p: int, t: int):
+        """Undo a previous _apply(p, t)"""
+        f = self._portfolio[p]
+        self._prog_tpm[p] = -1
+        self._tpm_load[t] -= self._req_time[p]
+        self._tpm_portfolio_members[t, f] -= 1
+        if self._tpm_portfolio_members[t, f] == 0:
+            self._tpm_portfolio_count[t] -= 1
+
+    def _assign(self, prog_id: str, tpm_id: str):
+        """Assign a program to a TPM, keeping the state arrays in sync"""
+        p = self._prog_idx[prog_id]
+        old = self._prog_tpm[p]
+        if old >= 0:
+            self._revert(p, old)
+        self._apply(p, self._tpm_idx[tpm_id])
+        self._assignments[prog_id] = tpm_id
+
+    def assignment_state(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Per-program TPM indices (-1 = unassigned) and timezone differences
+        (0 if unassigned), and per-TPM loads and portfolio counts, computed
+        from the assignments dict as it is now without changing any state"""
+        prog_tpm = np.full(len(self._prog_ids), -1, dtype=np.int64)
+        for prog_id, tpm_id in self._assignments.items():
+            p = self._prog_idx.get(prog_id)
+            t = self._tpm_idx.get(tpm_id)
+            if p is not None and t is not None:
+                prog_tpm[p] = t
+        assigned = np.flatnonzero(prog_tpm >= 0)
+        tpms = prog_tpm[assigned]
+        n_tpms = len(self._tpm_ids)
+
+        tz_diff = np.zeros(len(self._prog_ids))
+        tz_diff[assigned] = self._tz_diff[tpms, assigned]
+        loads = np.bincount(tpms, weights=self._req_time[assigned], minlength=n_tpms)
+        # Distinct (TPM, portfolio) pairs, counted per TPM
+        pairs = np.unique(tpms * len(self._portfolio_idx) + self._portfolio[assigned])
+        portfolio_counts = np.bincount(pairs // max(len(self._portfolio_idx), 1),
+                                       minlength=n_tpms)
+        return prog_tpm, tz_diff, loads, portfolio_counts
+
     def validate_assignment(self, prog_id: str, tpm_id: str) -> bool:
         """Validate if a program can be assigned to a TPM"""
-        program = self.programs[prog_id]
-        tpm = self.tpms[tpm_id]
+        return self._is_valid(self._prog_idx[prog_id], self._tpm_idx[tpm_id])
 
-        if tpm.level < program.required_level:
+    def _is_valid(self, p: int, t: int) -> bool:
+        """validate_assignment for program index p and TPM index t"""
+        if self._level[t] < self._req_level[p]:
             return False
 
-        if prog_id in tpm.conflicts:
+        if self._conflicts[t, p]:
             return False
 
-        current_load = sum(self.programs[p].required_time
-                          for p in self.assignments
-                          if self.assignments[p] == tpm_id and p != prog_id)
+        current_load = self._tpm_load[t]
+        if self._prog_tpm[p] == t:
+            current_load -= self._req_time[p]
 
-        if not tpm.allow_overload and (current_load + program.required_time > tpm.available_time):
+        if not self._allow_overload[t] and current_load + self._req_time[p] > self._available[t]:
             return False
 
-        assigned_portfolios = set(self.programs[p].portfolio
-                                for p in self.assignments
-                                if self.assignments[p] == tpm_id)
-        if program.portfolio not in assigned_portfolios and len(assigned_portfolios) >= TPMConstraints.MAX_PORTFOLIOS:
+        if (self._tpm_portfolio_members[t, self._portfolio[p]] == 0 and
+                self._tpm_portfolio_count[t] >= TPMConstraints.MAX_PORTFOLIOS):
             return False
 
         return True
 
+    def _available_tpm_mask(self, p: int) -> np.ndarray:
+        """validate_assignment for program index p against every TPM at once"""
+        f = self._portfolio[p]
+        load = self._tpm_load.copy()
+        own = self._prog_tpm[p]
+        if own >= 0:
+            load[own] -= self._req_time[p]
+        load += self._req_time[p]
+        return (self._static_ok[p] &
+                (self._allow_overload | (load <= self._available)) &
+                ((self._tpm_portfolio_members[:, f] > 0) |
+                 (self._tpm_portfolio_count < TPMConstraints.MAX_PORTFOLIOS)))
+
+    def _available_tpm_matrix(self, ps: np.ndarray) -> np.ndarray:
+        """_available_tpm_mask for several program indices at once (TPMs x programs)"""
+        req_time = self._req_time[ps]
+        # Same operation order as _available_tpm_mask, so the masks agree exactly
+        load = np.repeat(self._tpm_load[:, np.newaxis], len(ps), axis=1)
+        own = self._prog_tpm[ps]
+        assigned = np.flatnonzero(own >= 0)
+        load[own[assigned], assigned] -= req_time[assigned]
+        load += req_time
+        return (self._static_ok[ps].T &
+                (self._allow_overload[:, np.newaxis] | (load <= self._available[:, np.newaxis])) &
+                ((self._tpm_portfolio_members[:, self._portfolio[ps]] > 0) |
+                 (self._tpm_portfolio_count < TPMConstraints.MAX_PORTFOLIOS)[:, np.newaxis]))
+
+    def get_available_tpms(self, prog_id: str) -> List[str]:
+        """TPMs a program can currently be assigned to"""
+        return [self._tpm_ids[t]
+                for t in np.flatnonzero(self._available_tpm_mask(self._prog_idx[prog_id]))]
+
     def validate_fixed_assignments_solution(self, solution: Dict[str, str]) -> bool:
         """Verify all fixed assignments are respected in a solution"""
         for prog_id, fixed_tpm in self.fixed_assignments.items():
@@ -50,38 +235,58 @@ class BaseOptimizer:
 
     def calculate_assignment_score(self, prog_id: str, tpm_id: str) -> float:
         """Calculate score for assigning a program to a TPM"""
-        program = self.programs[prog_id]
-        tpm = self.tpms[tpm_id]
-
-        if not self.validate_assignment(prog_id, tpm_id):
+        p = self._prog_idx[prog_id]
+        t = self._tpm_idx[tpm_id]
+        if not self._is_valid(p, t):
             return -float('inf')
 
-        timezone_score = calculate_timezone_score(tpm.timezone, program)
-        skill_score = len(tpm.skills.intersection(program.required_skills)) / len(program.required_skills)
-        level_score = self._calculate_level_score(tpm.level, program.required_level)
-        preference_score = 0.2 if prog_id in tpm.desired_programs else 0.0
-
-        assigned_portfolios = set(self.programs[p].portfolio
-                                for p in self.assignments
-                                if self.assignments[p] == tpm_id)
-        portfolio_score = 1.0 if program.portfolio in assigned_portfolios else 0.5
-
-        return (0.3 * timezone_score +
-                0.25 * skill_score +
-                0.2 * level_score +
-                0.15 * portfolio_score +
-                0.1 * preference_score)
-
-    def _calculate_level_score(self, tpm_level: int, required_level: int) -> float:
-        if tpm_level == required_level:
-            return 1.0
-        elif tpm_level == required_level + 1:
-            return 0.7
-        elif tpm_level > required_level + 1:
-            return 0.4
-        else:
-            return 0.0
+        timezone_score = self._tz_score[t, p]
+        # Programs without skill requirements match any TPM
+        skill_score = (self._skill_overlap[t, p] / self._req_skill_count[p]
+                       if self._req_skill_count[p] else 1.0)
+        level_score = self._level_score[t, p]
+        portfolio_score = 1.0 if self._tpm_portfolio_members[t, self._portfolio[p]] else 0.5
+        preference_score = 0.2 if self._desired[t, p] else 0.0
+
+        return float(_weighted_score(timezone_score, skill_score, level_score,
+                                     portfolio_score, preference_score))
+
+    def calculate_assignment_scores(self, prog_id: str) -> np.ndarray:
+        """Scores for assigning a program to each TPM, in TPM order (-inf where invalid)"""
+        p = self._prog_idx[prog_id]
+        skill_score = (self._skill_overlap[:, p] / self._req_skill_count[p]
+                       if self._req_skill_count[p] else np.ones(len(self._tpm_ids)))
+        portfolio_score = np.where(self._tpm_portfolio_members[:, self._portfolio[p]] > 0, 1.0, 0.5)
+        preference_score = np.where(self._desired[:, p], 0.2, 0.0)
+
+        scores = _weighted_score(self._tz_score[:, p], skill_score, self._level_score[:, p],
+                                 portfolio_score, preference_score)
+        scores[~self._available_tpm_mask(p)] = -np.inf
+        return scores
+
+    def calculate_assignment_score_matrix(self, prog_ids: List[str]) -> np.ndarray:
+        """calculate_assignment_scores for several programs at once (TPMs x programs)"""
+        ps = np.array([self._prog_idx[prog_id] for prog_id in prog_ids], dtype=np.int64)
+        skill_count = self._req_skill_count[ps]
+        skill_score = np.divide(self._skill_overlap[:, ps], skill_count,
+                                out=np.ones((len(self._tpm_ids), len(ps))),
+                                where=skill_count > 0)
+        portfolio_score = np.where(self._tpm_portfolio_members[:, self._portfolio[ps]] > 0,
+                                   1.0, 0.5)
+        preference_score = np.where(self._desired[:, ps], 0.2, 0.0)
+
+        scores = _weighted_score(self._tz_score[:, ps], skill_score, self._level_score[:, ps],
+                                 portfolio_score, preference_score)
+        scores[~self._available_tpm_matrix(ps)] = -np.inf
+        return scores
 
     def optimize(self) -> Dict[str, str]:
         """Abstract method to be implemented by specific optimizers"""
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+
+def _weighted_score(timezone, skill, level, portfolio, preference):
+    """Weighted sum of the assignment score components, added in a fixed order
+    so scalar, per-program and matrix scores agree exactly"""
+    return (WEIGHTS_VEC[0] * timezone + WEIGHTS_VEC[1] * skill + WEIGHTS_VEC[2] * level +
+            WEIGHTS_VEC[3] * portfolio + WEIGHTS_VEC[4] * preference)
@@ -1,98 +1,44 @@
-from typing import Dict, List
-import random
+from typing import Dict, List, Optional
 import math
 from time import time
+import numpy as np
 from .base import BaseOptimizer
-from ..models import TPM, Program, ConstraintType
-from .solution import Solution
-
-class Objective:
-    def __init__(self, name: str, constraint_type: ConstraintType):
-        self.name = name
-        self.constraint_type = constraint_type
-
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
-        raise NotImplementedError
-
-class CapacityObjective(Objective):
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
-        tpm_loads = {tpm_id: 0.0 for tpm_id in tpms}
-        for prog_id, tpm_id in solution.items():
-            tpm_loads[tpm_id] += programs[prog_id].required_time
-
-        violations = 0
-        for tpm_id, load in tpm_loads.items():
-            if not tpms[tpm_id].allow_overload and load > tpms[tpm_id].available_time:
-                violations += (load - tpms[tpm_id].available_time) * 100
-        return -violations
-
-class UtilizationObjective(Objective):
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
-        tpm_loads = {tpm_id: 0.0 for tpm_id in tpms}
-        for prog_id, tpm_id in solution.items():
-            tpm_loads[tpm_id] += programs[prog_id].required_time
-
-        score = 0
-        MIN_UTILIZATION = 0.7
-        for tpm_id, load in tpm_loads.items():
-            if load > 0:  # Only consider utilized TPMs
-                utilization = load / tpms[tpm_id].available_time
-                if utilization < MIN_UTILIZATION:
-                    score -= (MIN_UTILIZATION - utilization) * 5
-        return score
-
-class TimezoneObjective(Objective):
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
-        from ..utils.timezone import timezone_difference
-        score = 0
-        for prog_id, tpm_id in solution.items():
-            tz_diff = timezone_difference(tpms[tpm_id].timezone,
-                                       programs[prog_id].timezone)
-            if tz_diff <= 3:  # Preferred timezone spread
-                score += 1
-            elif tz_diff <= 6:  # Maximum timezone spread
-                score += 0.5
-            else:
-                score -= 1
-        return score
-
-class PortfolioObjective(Objective):
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
-        tpm_portfolios = {}
-        TARGET_PORTFOLIO_DIVERSITY = 2
-        for prog_id, tpm_id in solution.items():
-            if tpm_id not in tpm_portfolios:
-                tpm_portfolios[tpm_id] = set()
-            tpm_portfolios[tpm_id].add(programs[prog_id].portfolio)
-
-        score = 0
-        for portfolios in tpm_portfolios.values():
-            if len(portfolios) > 2:  # Max portfolios
-                score -= (len(portfolios) - 2) * 2
-            elif len(portfolios) == TARGET_PORTFOLIO_DIVERSITY:
-                score += 1
-        return score
+from ..config.settings import OptimizationSettings
+from ..models import TPM, Program, ConstraintType, TPMConstraints
+from .solution import METRIC_NAMES
+from .objectives import (
+    CapacityObjective,
+    UtilizationObjective,
+    TimezoneObjective,
+    PortfolioObjective
+)
+from . import _sa_kernel
 
 class HybridOptimizer(BaseOptimizer):
-    def __init__(self, tpms: Dict[str, TPM], programs: Dict[str, Program]):
-        super().__init__(tpms, programs)
+    def __init__(self, tpms: Dict[str, TPM], programs: Dict[str, Program],
+                 seed: Optional[int] = None, verbose: bool = False):
+        super().__init__(tpms, programs, verbose)
+        self._rng = np.random.default_rng(seed)
         self.objectives = [
             CapacityObjective("capacity", ConstraintType.HARD),
             UtilizationObjective("utilization", ConstraintType.SOFT),
             TimezoneObjective("timezone", ConstraintType.SOFT),
             PortfolioObjective("portfolio", ConstraintType.SOFT)
         ]
+        self._tz_violation = self._tz_diff > TPMConstraints.MAX_TIMEZONE_SPREAD
+        # Per-assignment timezone objective: 1 within the preferred spread,
+        # 0.5 within the maximum spread, -1 beyond it
+        self._tz_objective = np.where(self._tz_diff <= TPMConstraints.PREFERRED_TIMEZONE_SPREAD, 1.0,
+                                      np.where(self._tz_violation, -1.0, 0.5))
+        for obj in self.objectives:
+            obj.prepare(self)
 
     def evaluate_solution(self, solution: Dict[str, str]) -> Dict[str, float]:
         """Evaluate all objectives for a solution"""
+        state = self._build_state(solution)
         scores = {}
         for obj in self.objectives:
-            scores[obj.name] = obj.evaluate(solution, self.tpms, self.programs)
+            scores[obj.name] = obj.evaluate(state)
         return scores
 
     def is_feasible(self, solution: Dict[str, str]) -> bool:
@@ -100,138 +46,135 @@ class HybridOptimizer(BaseOptimizer):
         if not self.validate_fixed_assignments_solution(solution):
             return False
 
+        state = self._build_state(solution)
         for obj in self.objectives:
             if (obj.constraint_type == ConstraintType.HARD and
-                obj.evaluate(solution, self.tpms, self.programs) < 0):
+                obj.evaluate(state) < 0):
                 return False
         return True
 
-    def get_neighbor(self, solution: Dict[str, str]) -> Dict[str, str]:
-        """Generate a neighbor solution maintaining feasibility"""
-        neighbor = solution.copy()
-        attempts = 0
-        max_attempts = 50
-
-        while attempts < max_attempts:
-            movable_programs = [prog_id for prog_id in solution.keys()
-                              if prog_id not in self.fixed_assignments]
-
-            if len(movable_programs) < 1:
-                return neighbor
-
-            if random.random() < 0.5 and len(movable_programs) >= 2:
-                # Try swapping
-                prog1, prog2 = random.sample(movable_programs, 2)
-                temp_neighbor = neighbor.copy()
-                temp_neighbor[prog1], temp_neighbor[prog2] = temp_neighbor[prog2], temp_neighbor[prog1]
-                if self.is_feasible(temp_neighbor):
-                    return temp_neighbor
-            else:
-                # Try reassignment
-                prog = random.choice(movable_programs)
-                available_tpms = [tpm_id for tpm_id in self.tpms.keys()
-                                if self.validate_assignment(prog, tpm_id)]
-                if available_tpms:
-                    temp_neighbor = neighbor.copy()
-                    temp_neighbor[prog] = random.choice(available_tpms)
-                    if self.is_feasible(temp_neighbor):
-                        return temp_neighbor
-
-            attempts += 1
-
-        return solution
+    def get_neighbor(self, state: _sa_kernel.IncrementalState) -> _sa_kernel.MoveLog:
+        """Move state to a feasible neighbor in place.
+
+        Returns the log of applied moves (n_moves is 0 if no feasible neighbor
+        was found); pass it to revert_neighbor to undo the move.
+        """
+        log = _sa_kernel.MoveLog.empty(len(state.metrics))
+        log.n_moves = _sa_kernel.propose_moves(
+            state.assign, state.metrics, state.loads, state.used,
+            state.portfolio_members, state.portfolio_counts, *self._metric_arrays()[:-1],
+            self._movable, *self._candidates, log.moves, log.saved, self._rng)
+        return log
+
+    def revert_neighbor(self, state: _sa_kernel.IncrementalState, log: _sa_kernel.MoveLog):
+        """Undo the moves returned by get_neighbor"""
+        _sa_kernel.undo_moves(log.moves, log.saved, log.n_moves, state.assign, state.metrics,
+                              state.loads, state.used, state.portfolio_members,
+                              state.portfolio_counts, *self._metric_arrays()[:-1])
 
     def optimize(self) -> Dict[str, str]:
         """Run hybrid optimization with Pareto dominance"""
         start_time = time()
-        MAX_RUNTIME = 300  # 5 minutes maximum
 
-        print("Creating initial solution...")
+        if self.verbose:
+            print("Creating initial solution...")
         # Start with fixed assignments
-        current_solution = Solution(self.fixed_assignments.copy(), self.tpms, self.programs)
-
-        # Initial assignment
-        unassigned = [prog_id for prog_id in self.programs
-                     if prog_id not in current_solution.assignments]
-
-        # Sort unassigned by complexity and time required
-        unassigned.sort(key=lambda x: (self.programs[x].complexity_score,
-                                     self.programs[x].required_time),
-                       reverse=True)
-
-        print(f"Assigning {len(unassigned)} programs...")
-        assignments = current_solution.assignments.copy()
-        for prog_id in unassigned:
-            available_tpms = [tpm_id for tpm_id in self.tpms.keys()
-                            if self.validate_assignment(prog_id, tpm_id)]
-            if available_tpms:
-                best_tpm = None
-                best_metrics = None
-                for tpm_id in available_tpms:
-                    temp_assignments = assignments.copy()
-                    temp_assignments[prog_id] = tpm_id
-                    temp_solution = Solution(temp_assignments, self.tpms, self.programs)
-                    if best_metrics is None or temp_solution.dominates(best_metrics):
-                        best_tpm = tpm_id
-                        best_metrics = temp_solution
-
-                if best_tpm:
-                    assignments[prog_id] = best_tpm
-
-        current_solution = Solution(assignments, self.tpms, self.programs)
-        best_solution = current_solution
-
-        # Simulated annealing with Pareto dominance
-        temperature = 1.0
-        cooling_rate = 0.99
-        min_temperature = 0.001
+        arrays = self._metric_arrays()
+        state = self._build_state(self.fixed_assignments)
+
+        # Initial assignment, by complexity and time required, largest first
+        unassigned_idx = self._complexity_order[state.assign[self._complexity_order] < 0]
+
+        if self.verbose:
+            print(f"Assigning {len(unassigned_idx)} programs...")
+        for p in unassigned_idx:
+            available_tpms = np.flatnonzero(self._available_tpm_mask(p))
+            if len(available_tpms):
+                # Switch to a later candidate whenever it Pareto-dominates the current pick
+                candidate_metrics = state.metrics + state.delta_if_assign(p, available_tpms,
+                                                                          *arrays[:-1])
+                best_k = 0
+                for k in range(1, len(available_tpms)):
+                    if _sa_kernel.dominates(candidate_metrics[k], candidate_metrics[best_k]):
+                        best_k = k
+                state.move(p, available_tpms[best_k], *arrays[:-1])
+
+        current, current_metrics = state.assign, state.metrics
+        best = current.copy()
+        best_metrics = current_metrics.copy()
+
+        self._prepare_moves(current)
+
+        # Local search with Pareto dominance. Every neighbor is accepted, so
+        # there is no temperature schedule: the search runs until the
+        # iteration, no-improvement or runtime limit is hit, in sweeps of
+        # SWEEP_ACCEPT_FACTOR * N accepted moves between limit checks.
+        n_programs = max(len(self._prog_ids), 1)
+        max_accepted = max(math.ceil(OptimizationSettings.SWEEP_ACCEPT_FACTOR * n_programs), 1)
         iteration = 0
         max_iterations = 5000
-        no_improvement_limit = 1000
+        no_improvement_limit = OptimizationSettings.NO_IMPROVEMENT_LIMIT
         no_improvement_count = 0
 
-        print("\nStarting optimization:")
-        while (temperature > min_temperature and
-               iteration < max_iterations and
-               time() - start_time < MAX_RUNTIME and
-               no_improvement_count < no_improvement_limit):
+        if self.verbose:
+            print("\nStarting optimization:")
+        if not (current >= 0).any():  # No valid neighbor can be found
+            no_improvement_count = no_improvement_limit
 
-            if iteration % 100 == 0:
-                print(f"Iteration {iteration}, Temperature: {temperature:.3f}")
-                print(f"Current metrics: {current_solution.metrics}")
-
-            # Generate neighbor
-            neighbor = self.get_neighbor(current_solution.assignments)
-            if not neighbor:  # No valid neighbor found
-                no_improvement_count += 1
-                continue
-
-            neighbor_solution = Solution(neighbor, self.tpms, self.programs)
-
-            # Accept if neighbor dominates current
-            if neighbor_solution.dominates(current_solution):
-                current_solution = neighbor_solution
-                if neighbor_solution.dominates(best_solution):
-                    best_solution = neighbor_solution
-                    no_improvement_count = 0
-                    print(f"New best solution found: {best_solution.metrics}")
-            else:
-                # Accept with probability based on number of improved metrics
-                improved_metrics = sum(1 for m, v in neighbor_solution.metrics.items()
-                                    if v < current_solution.metrics[m])
-                probability = math.exp(improved_metrics / temperature)
-                if random.random() < probability:
-                    current_solution = neighbor_solution
-
-            temperature *= cooling_rate
-            iteration += 1
-            no_improvement_count += 1
-
-        runtime = time() - start_time
-        print(f"\nOptimization completed:")
-        print(f"Runtime: {runtime:.1f} seconds")
-        print(f"Iterations: {iteration}")
-        print(f"Final metrics: {best_solution.metrics}")
-
-        self.assignments = best_solution.assignments
-        return self.assignments
\ No newline at end of file
+        sweep = 0
+        while (iteration < max_iterations and
+               time() - start_time < OptimizationSettings.MAX_RUNTIME and
+               no_improvement_count < no_improvement_limit):
+            if self.verbose:
+                print(f"Iteration {iteration}, Sweep: {sweep}")
+                print(f"Current metrics: {self._metrics_dict(current_metrics)}")
+
+            iteration, no_improvement_count, best_improved = _sa_kernel.sa_sweep(
+                current, current_metrics, state.loads, state.used,
+                state.portfolio_members, state.portfolio_counts, best, best_metrics,
+                *self._metric_arrays()[:-1],
+                self._movable, *self._candidates, max_accepted,
+                iteration, max_iterations, no_improvement_count, no_improvement_limit,
+                self._rng)
+            if best_improved and self.verbose:
+                print(f"New best solution found: {self._metrics_dict(best_metrics)}")
+            sweep += 1
+
+        if self.verbose:
+            print(f"\nOptimization completed:")
+            print(f"Runtime: {time() - start_time:.1f} seconds")
+            print(f"Iterations: {iteration}")
+            print(f"Final metrics: {self._metrics_dict(best_metrics)}")
+
+        self.assignments = {self._prog_ids[p]: self._tpm_ids[t]
+                            for p, t in enumerate(best) if t >= 0}
+        return self.assignments
+
+    def _to_index_array(self, assignments: Dict[str, str]) -> np.ndarray:
+        """Encode an assignment dict as TPM indices per program (-1 = unassigned)"""
+        assign = np.full(len(self._prog_ids), -1, dtype=np.int32)
+        for prog_id, tpm_id in assignments.items():
+            assign[self._prog_idx[prog_id]] = self._tpm_idx[tpm_id]
+        return assign
+
+    def _prepare_moves(self, assign: np.ndarray):
+        """Precompute which programs may move and the TPMs each may move to"""
+        # Programs left unassigned by the greedy pass stay unassigned
+        self._movable = np.array([p for p in np.flatnonzero(assign >= 0)
+                                  if self._prog_ids[p] not in self.fixed_assignments],
+                                 dtype=np.int64)
+        self._candidates = _sa_kernel.candidate_lists(np.ascontiguousarray(
+            self._available_tpm_matrix(np.arange(len(self._prog_ids))).T))
+
+    def _build_state(self, assignments: Dict[str, str]) -> _sa_kernel.IncrementalState:
+        return _sa_kernel.IncrementalState.build(self._to_index_array(assignments),
+                                                 *self._metric_arrays())
+
+    def _metric_arrays(self) -> tuple:
+        """Arrays consumed by the annealing kernels after the assignment"""
+        return (self._req_time, self._available, self._allow_overload,
+                self._tz_violation, self._portfolio, len(self._portfolio_idx))
+
+    @staticmethod
+    def _metrics_dict(metrics: np.ndarray) -> Dict[str, int]:
+        return {name: int(value) for name, value in zip(METRIC_NAMES, metrics)}
@@ -1,24 +1,60 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from pulp import *
-import math
+import os
+import numpy as np
 from .base import BaseOptimizer
-from ..models import TPM, Program
+from ..config.settings import OptimizationSettings
+from ..models import TPM, Program, TPMConstraints
 from .solution import Solution
 
 class MILPOptimizer(BaseOptimizer):
-    def __init__(self, tpms: Dict[str, TPM], programs: Dict[str, Program]):
-        super().__init__(tpms, programs)
+    def __init__(self, tpms: Dict[str, TPM], programs: Dict[str, Program],
+                 verbose: bool = False,
+                 time_limit: Optional[float] = OptimizationSettings.MILP_TIME_LIMIT,
+                 gap_rel: Optional[float] = OptimizationSettings.MILP_GAP_REL,
+                 warm_start: bool = True,
+                 threads: Optional[int] = None,
+                 solver: Optional[LpSolver] = None):
+        super().__init__(tpms, programs, verbose)
         self.fixed_assignment_overloads = {}
+        # Solver options; None disables the time limit or gap, and threads
+        # defaults to every core
+        self.time_limit = time_limit
+        self.gap_rel = gap_rel
+        self.warm_start = warm_start
+        self.threads = threads if threads is not None else os.cpu_count()
+        # Any configured PuLP solver; overrides the options above
+        self.solver = solver
+
+    def _solver(self) -> LpSolver:
+        """The configured solver, else the fastest one installed: Gurobi, then
+        HiGHS (in-process, parallel) when highspy is installed, then CBC.
+        HiGHS does not take the greedy warm start."""
+        if self.solver is not None:
+            return self.solver
+        gurobi = GUROBI_CMD(msg=False, threads=self.threads, timeLimit=self.time_limit,
+                            gapRel=self.gap_rel, warmStart=self.warm_start)
+        if gurobi.available():
+            return gurobi
+        highs = HiGHS(msg=False, threads=self.threads, timeLimit=self.time_limit,
+                      gapRel=self.gap_rel)
+        if highs.available():
+            return highs
+        return PULP_CBC_CMD(msg=False, threads=self.threads, timeLimit=self.time_limit,
+                            gapRel=self.gap_rel, warmStart=self.warm_start)
 
     def analyze_tpm_capacities(self):
         """Analyze TPM capacities and fixed assignments"""
+        if not self.verbose:
+            return
         print("\nAnalyzing TPM capacities:")
-        for tpm_id, tpm in self.tpms.items():
-            fixed_load = sum(
-                program.required_time
-                for program in self.programs.values()
-                if program.fixed_tpm == tpm_id
-            )
+        # Fixed load of every TPM in one pass over the programs
+        fixed = [(self._tpm_idx[p.fixed_tpm], p.required_time) for p in self.programs.values()
+                 if p.fixed_tpm in self._tpm_idx]
+        fixed_loads = np.zeros(len(self._tpm_ids))
+        for t, required_time in fixed:
+            fixed_loads[t] += required_time
+        for (tpm_id, tpm), fixed_load in zip(self.tpms.items(), fixed_loads.tolist()):
             print(f"TPM {tpm_id} ({tpm.name}): ")
             print(f"  Base capacity: {tpm.available_time: .2f}")
             print(f"  Fixed assignments load: {fixed_load: .2f}")
@@ -26,11 +62,12 @@ class MILPOptimizer(BaseOptimizer):
 
     def analyze_fixed_assignments(self) -> Tuple[bool, List[str]]:
         """Analyze and validate fixed assignments"""
-        print("\nTPM Overload Settings:")
-        for tpm_id, tpm in self.tpms.items():
-            print(f"TPM {tpm_id} ({tpm.name}): allow_overload = {tpm.allow_overload}")
+        if self.verbose:
+            print("\nTPM Overload Settings:")
+            for tpm_id, tpm in self.tpms.items():
+                print(f"TPM {tpm_id} ({tpm.name}): allow_overload = {tpm.allow_overload}")
 
-        print("\nAnalyzing fixed assignments:")
+            print("\nAnalyzing fixed assignments:")
         issues = []
         tpm_loads = {tpm_id: 0.0 for tpm_id in self.tpms}
 
@@ -43,14 +80,15 @@ class MILPOptimizer(BaseOptimizer):
                 tpm = self.tpms[program.fixed_tpm]
                 tpm_loads[program.fixed_tpm] += program.required_time
 
-                print(f"\nProgram {prog_id}:")
-                print(f"  Required time: {program.required_time}")
-                print(f"  Fixed TPM {program.fixed_tpm} ({tpm.name}):")
-                print(f"    Available time: {tpm.available_time}")
-                print(f"    Current load: {tpm_loads[program.fixed_tpm]}")
-                print(f"    Required level: {program.required_level}")
-                print(f"    TPM level: {tpm.level}")
-                print(f"    Allow overload: {tpm.allow_overload}")
+                if self.verbose:
+                    print(f"\nProgram {prog_id}:")
+                    print(f"  Required time: {program.required_time}")
+                    print(f"  Fixed TPM {program.fixed_tpm} ({tpm.name}):")
+                    print(f"    Available time: {tpm.available_time}")
+                    print(f"    Current load: {tpm_loads[program.fixed_tpm]}")
+                    print(f"    Required level: {program.required_level}")
+                    print(f"    TPM level: {tpm.level}")
+                    print(f"    Allow overload: {tpm.allow_overload}")
 
                 if not self.validate_assignment(prog_id, program.fixed_tpm):
                     issues.append(f"Program {prog_id}: Invalid fixed assignment to TPM {program.fixed_tpm}")
@@ -65,7 +103,7 @@ class MILPOptimizer(BaseOptimizer):
                         f"Fixed assignments require {load:.2f} FTE, but capacity is {self.tpms[tpm_id].available_time:.2f} FTE "
                         f"and overload is not allowed"
                     )
-                else:
+                elif self.verbose:
                     print(f"Note: TPM {tpm_id} ({self.tpms[tpm_id].name}) will be overloaded: "
                           f"{load:.2f} FTE > {self.tpms[tpm_id].available_time:.2f} FTE "
                           f"but overload is allowed")
@@ -74,28 +112,34 @@ class MILPOptimizer(BaseOptimizer):
 
     def analyze_level_requirements(self) -> Tuple[bool, List[str]]:
         """Analyze level requirements by bandwidth"""
-        print("\nAnalyzing level requirements by bandwidth:")
+        if self.verbose:
+            print("\nAnalyzing level requirements by bandwidth:")
         issues = []
 
+        # Per-level totals from the program and TPM arrays, one pass each
+        fixed = np.array([p.fixed_tpm is not None for p in self.programs.values()], dtype=bool)
+        program_time = np.bincount(self._req_level, weights=self._req_time, minlength=6)
+        fixed_time = np.bincount(self._req_level[fixed], weights=self._req_time[fixed],
+                                 minlength=6)
+        tpm_capacity = np.bincount(self._level, weights=self._available, minlength=6)
+        # Capacity at or above each level is a suffix sum over levels
+        tpm_capacity = np.cumsum(tpm_capacity[::-1])[::-1]
+
         for level in range(1, 6):
-            program_time_at_level = sum(p.required_time for p in self.programs.values()
-                                        if p.required_level == level)
-            tpm_capacity_at_or_above = sum(t.available_time for t in self.tpms.values()
-                                           if t.level >= level)
-            fixed_assignments_at_level = sum(
-                p.required_time for p in self.programs.values()
-                if p.required_level == level and p.fixed_tpm is not None
-            )
+            program_time_at_level = float(program_time[level])
+            tpm_capacity_at_or_above = float(tpm_capacity[level])
+            fixed_assignments_at_level = float(fixed_time[level])
 
             remaining_program_time = program_time_at_level - fixed_assignments_at_level
             remaining_tpm_capacity = tpm_capacity_at_or_above - fixed_assignments_at_level
 
-            print(f"\nLevel {level}:")
-            print(f"  Total program time requiring this level: {program_time_at_level:.2f}")
-            print(f"  Fixed assignments at this level: {fixed_assignments_at_level:.2f}")
-            print(f"  Remaining program time to assign: {remaining_program_time:.2f}")
-            print(f"  TPM capacity at or above this level: {tpm_capacity_at_or_above:.2f}")
-            print(f"  Remaining TPM capacity: {remaining_tpm_capacity:.2f}")
+            if self.verbose:
+                print(f"\nLevel {level}:")
+                print(f"  Total program time requiring this level: {program_time_at_level:.2f}")
+                print(f"  Fixed assignments at this level: {fixed_assignments_at_level:.2f}")
+                print(f"  Remaining program time to assign: {remaining_program_time:.2f}")
+                print(f"  TPM capacity at or above this level: {tpm_capacity_at_or_above:.2f}")
+                print(f"  Remaining TPM capacity: {remaining_tpm_capacity:.2f}")
 
             if remaining_program_time > remaining_tpm_capacity:
                 issues.append(
@@ -108,7 +152,8 @@ class MILPOptimizer(BaseOptimizer):
 
     def optimize(self) -> Dict[str, str]:
         """Run the MILP optimization with detailed feasibility checking"""
-        print("\nPerforming pre-optimization analysis...")
+        if self.verbose:
+            print("\nPerforming pre-optimization analysis...")
 
         self.analyze_tpm_capacities()
 
@@ -119,11 +164,13 @@ class MILPOptimizer(BaseOptimizer):
             if program.fixed_tpm
         }
 
-        print(f"\nProcessing {len(fixed_assignments)} fixed assignments...")
+        if self.verbose:
+            print(f"\nProcessing {len(fixed_assignments)} fixed assignments...")
         for prog_id, tpm_id in fixed_assignments.items():
             if tpm_id in self.tpms:
-                self.assignments[prog_id] = tpm_id
-                print(f"Pre-assigned Program {prog_id} to TPM {tpm_id}")
+                self._assign(prog_id, tpm_id)
+                if self.verbose:
+                    print(f"Pre-assigned Program {prog_id} to TPM {tpm_id}")
 
         # Get remaining programs
         remaining_programs = {
@@ -135,49 +182,104 @@ class MILPOptimizer(BaseOptimizer):
         # Create MILP model
         model = LpProblem("TPM_Assignment", LpMaximize)
 
-        # Decision variables
-        x = LpVariable.dicts("assign",
-                             ((i, j) for i in self.tpms for j in remaining_programs),
-                             cat='Binary')
-
-        # Modified objective function handling
-        objective_terms = []
-        for i in self.tpms:
-            for j in remaining_programs:
-                score = self.calculate_assignment_score(j, i)
-                if score != -float('inf'):
-                    objective_terms.append(score * x[i, j])
-                else:
-                    # If assignment is invalid, force variable to 0
-                    model += x[i, j] == 0
+        # Decision variables, only for valid (TPM, program) pairs; every
+        # other pair is implicitly fixed to 0
+        remaining_ids = list(remaining_programs)
+        scores = self.calculate_assignment_score_matrix(remaining_ids)
+        valid_i, valid_j = np.nonzero(np.isfinite(scores))
+        pairs = [(self._tpm_ids[i], remaining_ids[j])
+                 for i, j in zip(valid_i.tolist(), valid_j.tolist())]
+        pair_scores = dict(zip(pairs, scores[valid_i, valid_j].tolist()))
+        x = LpVariable.dicts("assign", pairs, cat='Binary')
+        programs_by_tpm = {i: [] for i in self.tpms}
+        tpms_by_program = {j: [] for j in remaining_programs}
+        for i, j in pairs:
+            programs_by_tpm[i].append(j)
+            tpms_by_program[j].append(i)
 
-        model += lpSum(objective_terms)
+        # Objective, built as a single expression from (variable, coefficient) pairs
+        model += LpAffineExpression([(x[pair], score)
+                                     for pair, score in pair_scores.items() if score])
 
-        # Constraints
+        # Constraints, built directly as LpConstraint rows rather than through
+        # the expression operators, which copy every row
         for j in remaining_programs:
-            model += lpSum(x[i, j] for i in self.tpms) == 1
+            model.addConstraint(LpConstraint(
+                LpAffineExpression([(x[i, j], 1) for i in tpms_by_program[j]]),
+                LpConstraintEQ, rhs=1))
 
+        # Capacity each TPM has left after the pre-assigned programs, read once
+        # from the per-TPM load array
+        capacity = dict(zip(self._tpm_ids, (self._available - self._tpm_load).tolist()))
         for i in self.tpms:
-            current_load = sum(self.programs[p].required_time
-                             for p in self.assignments if self.assignments[p] == i)
             if not self.tpms[i].allow_overload:
-                model += (lpSum(remaining_programs[j].required_time * x[i, j]
-                             for j in remaining_programs) <=
-                        self.tpms[i].available_time - current_load)
+                model.addConstraint(LpConstraint(
+                    LpAffineExpression([(x[i, j], remaining_programs[j].required_time)
+                                        for j in programs_by_tpm[i]]),
+                    LpConstraintLE, rhs=capacity[i]))
 
-        # Add validation constraints
+        # At most MAX_PORTFOLIOS distinct portfolios per TPM, counting the ones
+        # the pre-assigned programs already cover: y[i, f] is 1 when TPM i takes
+        # a program of a portfolio f it does not yet hold. Only TPMs whose
+        # eligible programs could exceed their remaining slots get the rows.
+        new_portfolios = {}
         for i in self.tpms:
-            for j in remaining_programs:
-                if not self.validate_assignment(j, i):
-                    model += x[i, j] == 0
+            t = self._tpm_idx[i]
+            by_portfolio = {}
+            for j in programs_by_tpm[i]:
+                f = int(self._portfolio[self._prog_idx[j]])
+                if self._tpm_portfolio_members[t, f] == 0:
+                    by_portfolio.setdefault(f, []).append(j)
+            slots = max(TPMConstraints.MAX_PORTFOLIOS - int(self._tpm_portfolio_count[t]), 0)
+            if len(by_portfolio) > slots:
+                new_portfolios[i] = (by_portfolio, slots)
+        y = LpVariable.dicts("portfolio", [(i, f) for i, (by_portfolio, _) in new_portfolios.items()
+                                           for f in by_portfolio], cat='Binary')
+        for i, (by_portfolio, slots) in new_portfolios.items():
+            for f, programs in by_portfolio.items():
+                for j in programs:
+                    model.addConstraint(LpConstraint(
+                        LpAffineExpression([(x[i, j], 1), (y[i, f], -1)]),
+                        LpConstraintLE, rhs=0))
+            model.addConstraint(LpConstraint(
+                LpAffineExpression([(y[i, f], 1) for f in by_portfolio]),
+                LpConstraintLE, rhs=slots))
+
+        if self.warm_start:
+            self._set_initial_values(x, y, pair_scores, tpms_by_program, remaining_programs,
+                                     capacity)
 
         # Solve
-        status = model.solve()
+        status = model.solve(self._solver())
 
         if status == 1:  # Optimal solution found
-            for i in self.tpms:
-                for j in remaining_programs:
-                    if value(x[i, j]) > 0.5:
-                        self.assignments[j] = i
+            for (i, j), var in x.items():
+                if var.varValue > 0.5:
+                    self._assign(j, i)
+
+        return self.assignments
 
-        return self.assignments
\ No newline at end of file
+    def _set_initial_values(self, x: Dict, y: Dict, pair_scores: Dict, tpms_by_program: Dict,
+                            remaining_programs: Dict[str, Program], capacity: Dict[str, float]):
+        """Seed CBC with a greedy solution: each program, largest first, goes
+        to its best scoring TPM that still has capacity and a portfolio slot"""
+        remaining = capacity.copy()
+        portfolios = {i: set(np.flatnonzero(self._tpm_portfolio_members[self._tpm_idx[i]]).tolist())
+                      for i in self.tpms}
+        for key in x:
+            x[key].setInitialValue(0)
+        for key in y:
+            y[key].setInitialValue(0)
+        for j in sorted(remaining_programs, key=lambda j: -remaining_programs[j].required_time):
+            required_time = remaining_programs[j].required_time
+            f = int(self._portfolio[self._prog_idx[j]])
+            fits = [i for i in tpms_by_program[j]
+                    if (self.tpms[i].allow_overload or required_time <= remaining[i]) and
+                    (f in portfolios[i] or len(portfolios[i]) < TPMConstraints.MAX_PORTFOLIOS)]
+            if fits:
+                best = max(fits, key=lambda i: pair_scores[i, j])
+                x[best, j].setInitialValue(1)
+                if (best, f) in y:
+                    y[best, f].setInitialValue(1)
+                remaining[best] -= required_time
+                portfolios[best].add(f)
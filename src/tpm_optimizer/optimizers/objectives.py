@@ -1,76 +1,63 @@
-from typing import Dict
-from ..models import TPM, Program, ConstraintType, TPMConstraints
-from ..utils import timezone_difference
+import numpy as np
+from ..models import ConstraintType, TPMConstraints
+from ._sa_kernel import IncrementalState
+from .base import BaseOptimizer
 
 class Objective:
+    __slots__ = ('name', 'constraint_type')
+
     def __init__(self, name: str, constraint_type: ConstraintType):
         self.name = name
         self.constraint_type = constraint_type
 
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
+    def prepare(self, optimizer: BaseOptimizer):
+        """Cache the optimizer arrays evaluate needs; call once before evaluating"""
+
+    def evaluate(self, state: IncrementalState) -> float:
+        """Score an assignment from its per-TPM aggregates"""
         raise NotImplementedError
 
 
 class CapacityObjective(Objective):
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
-        tpm_loads = {tpm_id: 0.0 for tpm_id in tpms}
-        for prog_id, tpm_id in solution.items():
-            tpm_loads[tpm_id] += programs[prog_id].required_time
+    __slots__ = ('_capacity',)
 
-        violations = 0
-        for tpm_id, load in tpm_loads.items():
-            if not tpms[tpm_id].allow_overload and load > tpms[tpm_id].available_time:
-                violations += (load - tpms[tpm_id].available_time) * 100
-        return -violations
+    def prepare(self, optimizer: BaseOptimizer):
+        # TPMs that allow overload never exceed their capacity
+        self._capacity = np.where(optimizer._allow_overload, np.inf, optimizer._available)
+
+    def evaluate(self, state: IncrementalState) -> float:
+        return -float(np.maximum(state.loads - self._capacity, 0.0).sum() * 100)
 
 
 class UtilizationObjective(Objective):
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
-        tpm_loads = {tpm_id: 0.0 for tpm_id in tpms}
-        for prog_id, tpm_id in solution.items():
-            tpm_loads[tpm_id] += programs[prog_id].required_time
+    __slots__ = ('_available',)
+
+    def prepare(self, optimizer: BaseOptimizer):
+        self._available = optimizer._available
 
-        score = 0
-        for tpm_id, load in tpm_loads.items():
-            if load > 0:  # Only consider utilized TPMs
-                utilization = load / tpms[tpm_id].available_time
-                if utilization < TPMConstraints.MIN_UTILIZATION:
-                    score -= (TPMConstraints.MIN_UTILIZATION - utilization) * 5
-        return score
+    def evaluate(self, state: IncrementalState) -> float:
+        used = state.loads > 0  # Only consider utilized TPMs
+        utilization = state.loads[used] / self._available[used]
+        shortfall = np.maximum(TPMConstraints.MIN_UTILIZATION - utilization, 0.0)
+        return -float(shortfall.sum() * 5)
 
 
 class TimezoneObjective(Objective):
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
-        score = 0
-        for prog_id, tpm_id in solution.items():
-            tz_diff = timezone_difference(tpms[tpm_id].timezone,
-                                      programs[prog_id].timezone)
-            if tz_diff <= TPMConstraints.PREFERRED_TIMEZONE_SPREAD:
-                score += 1
-            elif tz_diff <= TPMConstraints.MAX_TIMEZONE_SPREAD:
-                score += 0.5
-            else:
-                score -= 1
-        return score
+    __slots__ = ('_tz_objective',)
+
+    def prepare(self, optimizer: BaseOptimizer):
+        self._tz_objective = optimizer._tz_objective
+
+    def evaluate(self, state: IncrementalState) -> float:
+        assigned = np.flatnonzero(state.assign >= 0)
+        return float(self._tz_objective[state.assign[assigned], assigned].sum())
 
 
 class PortfolioObjective(Objective):
-    def evaluate(self, solution: Dict[str, str], tpms: Dict[str, TPM],
-                 programs: Dict[str, Program]) -> float:
-        tpm_portfolios = {}
-        for prog_id, tpm_id in solution.items():
-            if tpm_id not in tpm_portfolios:
-                tpm_portfolios[tpm_id] = set()
-            tpm_portfolios[tpm_id].add(programs[prog_id].portfolio)
-
-        score = 0
-        for portfolios in tpm_portfolios.values():
-            if len(portfolios) > TPMConstraints.MAX_PORTFOLIOS:
-                score -= (len(portfolios) - TPMConstraints.MAX_PORTFOLIOS) * 2
-            elif len(portfolios) == TPMConstraints.TARGET_PORTFOLIO_DIVERSITY:
-                score += 1
-        return score
\ No newline at end of file
+    __slots__ = ()
+
+    def evaluate(self, state: IncrementalState) -> float:
+        n = state.portfolio_counts
+        excess = n - TPMConstraints.MAX_PORTFOLIOS
+        return float(np.where(excess > 0, -2 * excess,
+                              np.where(n == TPMConstraints.TARGET_PORTFOLIO_DIVERSITY, 1, 0)).sum())
@@ -1,14 +1,15 @@
-from typing import Dict
-import random
-import math
+from typing import Dict, Optional
+import numpy as np
 from .base import BaseOptimizer
 from ..models import TPM, Program
-from ..utils.timezone import timezone_difference
+from . import _sa_kernel
 
 
 class SimulatedAnnealingOptimizer(BaseOptimizer):
-    def __init__(self, tpms: Dict[str, TPM], programs: Dict[str, Program]):
-        super().__init__(tpms, programs)
+    def __init__(self, tpms: Dict[str, TPM], programs: Dict[str, Program],
+                 seed: Optional[int] = None, verbose: bool = False):
+        super().__init__(tpms, programs, verbose)
+        self._rng = np.random.default_rng(seed)
         # SA parameters
         self.temperature = 1.0
         self.cooling_rate = 0.995
@@ -29,6 +30,11 @@ class SimulatedAnnealingOptimizer(BaseOptimizer):
 
         MIN_UTILIZATION = 0.7  # Minimum desired utilization
 
+        # Portfolios assigned to each TPM across the whole solution
+        tpm_portfolios = {}
+        for prog_id, tpm_id in solution.items():
+            tpm_portfolios.setdefault(tpm_id, set()).add(self.programs[prog_id].portfolio)
+
         for prog_id, tpm_id in solution.items():
             program = self.programs[prog_id]
             tpm = self.tpms[tpm_id]
@@ -49,15 +55,11 @@ class SimulatedAnnealingOptimizer(BaseOptimizer):
             total_score += assignment_score
 
             # Portfolio diversity check
-            assigned_portfolios = set(self.programs[p].portfolio
-                                      for p, t in solution.items()
-                                      if t == tpm_id)
-            if len(assigned_portfolios) > 2:
+            if len(tpm_portfolios[tpm_id]) > 2:
                 portfolio_violations += 1
 
             # Timezone check
-            tz_diff = timezone_difference(tpm.timezone, program.timezone)
-            if tz_diff > 6:
+            if self._tz_diff[self._tpm_idx[tpm_id], self._prog_idx[prog_id]] > 6:
                 timezone_violations += 1
 
         # Add stronger utilization penalty
@@ -88,30 +90,56 @@ class SimulatedAnnealingOptimizer(BaseOptimizer):
 
         return total_score
 
-    def get_neighbor_solution(self, current_solution: Dict[str, str]) -> Dict[str, str]:
-        """Generate a neighbor solution with small modifications"""
-        neighbor = current_solution.copy()
-
-        # Get only non-fixed assignments
-        movable_programs = [prog_id for prog_id in current_solution.keys()
-                            if prog_id not in self.fixed_assignments]
-
-        if len(movable_programs) < 1:
-            return neighbor
-
-        if random.random() < 0.5 and len(movable_programs) >= 2:
-            # Swap two non-fixed assignments
-            prog1, prog2 = random.sample(movable_programs, 2)
-            neighbor[prog1], neighbor[prog2] = neighbor[prog2], neighbor[prog1]
-        else:
-            # Change single non-fixed assignment
-            prog = random.choice(movable_programs)
-            available_tpms = [tpm_id for tpm_id in self.tpms.keys()
-                              if self.validate_assignment(prog, tpm_id)]
-            if available_tpms:
-                neighbor[prog] = random.choice(available_tpms)
-
-        return neighbor
+    def _init_score_state(self, solution: Dict[str, str]):
+        """Build the per-TPM score shares of a solution.
+
+        Programs keep the position they have in solution, which
+        calculate_solution_score uses to order the running load sums.
+        """
+        n_tpms, n_programs = len(self._tpm_ids), len(self._prog_ids)
+        self._order = np.array([self._prog_idx[prog_id] for prog_id in solution],
+                               dtype=np.int64)
+        self._rank = np.zeros(n_programs, dtype=np.int64)
+        self._rank[self._order] = np.arange(len(self._order))
+        # Programs of each TPM, in rank order
+        self._sa_assign = np.full(n_programs, -1, dtype=np.int64)
+        self._members = np.zeros((n_tpms, n_programs), dtype=np.int64)
+        self._n_members = np.zeros(n_tpms, dtype=np.int64)
+        for prog_id, tpm_id in solution.items():
+            self._relocate(self._prog_idx[prog_id], self._tpm_idx[tpm_id])
+
+        # Assignment scores and candidate TPMs only depend on the optimizer
+        # state, which does not change while annealing
+        self._pair_scores = np.ascontiguousarray(
+            self.calculate_assignment_score_matrix(self._prog_ids).T)
+        self._candidates = _sa_kernel.candidate_lists(np.ascontiguousarray(
+            self._available_tpm_matrix(np.arange(n_programs)).T))
+        self._tz_violation = self._tz_diff > 6
+
+        self._contribution = np.zeros(n_tpms)
+        self._n_invalid = np.zeros(n_tpms, dtype=np.int64)
+        self._used = np.zeros(n_tpms, dtype=bool)
+        self._overloaded = np.zeros(n_tpms, dtype=bool)
+        for t in range(n_tpms):
+            self._refresh_tpm(t)
+
+    def _score_arrays(self) -> tuple:
+        """Arrays consumed by the score kernels after the per-TPM shares"""
+        return (self._req_time, self._available, self._allow_overload, self._pair_scores,
+                self._tz_violation, self._portfolio, len(self._portfolio_idx))
+
+    def _relocate(self, p: int, t: int):
+        _sa_kernel.relocate(p, t, self._sa_assign, self._rank, self._members, self._n_members)
+
+    def _refresh_tpm(self, t: int):
+        _sa_kernel.refresh_tpm(t, self._members, self._n_members, self._contribution,
+                               self._n_invalid, self._used, self._overloaded,
+                               *self._score_arrays())
+
+    def _current_score(self) -> float:
+        """calculate_solution_score of the solution tracked by the score state"""
+        return float(_sa_kernel.solution_score(self._contribution, self._n_invalid,
+                                               self._used, self._overloaded))
 
     def optimize(self) -> Dict[str, str]:
         """Run simulated annealing optimization"""
@@ -123,50 +151,45 @@ class SimulatedAnnealingOptimizer(BaseOptimizer):
                       if prog_id not in current_solution]
 
         for prog_id in unassigned:
-            available_tpms = [tpm_id for tpm_id in self.tpms.keys()
-                              if self.validate_assignment(prog_id, tpm_id)]
+            available_tpms = self.get_available_tpms(prog_id)
             if available_tpms:
-                current_solution[prog_id] = random.choice(available_tpms)
+                current_solution[prog_id] = available_tpms[self._rng.integers(len(available_tpms))]
 
-        current_score = self.calculate_solution_score(current_solution)
-        best_solution = current_solution.copy()
+        self._init_score_state(current_solution)
+        current_score = self._current_score()
+        best = self._sa_assign.copy()
         best_score = current_score
+        # Fixed assignments are never moved, so every neighbor keeps them
+        movable = np.array([self._prog_idx[prog_id] for prog_id in current_solution
+                            if prog_id not in self.fixed_assignments], dtype=np.int64)
+
+        # Temperature at each iteration, multiplied out in the same order as a
+        # running temperature *= cooling_rate; annealing stops at the first
+        # temperature at or below min_temperature
+        temperatures = np.full(self.max_iterations + 1, self.cooling_rate)
+        temperatures[0] = self.temperature
+        np.cumprod(temperatures, out=temperatures)
+        n_iterations = int(np.argmax(temperatures <= self.min_temperature))
+        if temperatures[n_iterations] > self.min_temperature:
+            n_iterations = self.max_iterations
+        inverse_temperatures = 1.0 / temperatures
 
-        temperature = self.temperature
         iteration = 0
-
-        while temperature > self.min_temperature and iteration < self.max_iterations:
-            neighbor = self.get_neighbor_solution(current_solution)
-
-            # Skip invalid solutions
-            if not self.validate_fixed_assignments_solution(neighbor):
-                continue
-
-            neighbor_score = self.calculate_solution_score(neighbor)
-
-            # Accept better solutions
-            if neighbor_score > current_score:
-                current_solution = neighbor
-                current_score = neighbor_score
-                if current_score > best_score:
-                    best_solution = current_solution.copy()
-                    best_score = current_score
-            else:
-                # Accept worse solutions with probability based on temperature
-                delta = neighbor_score - current_score
-                probability = math.exp(delta / temperature)
-                if random.random() < probability:
-                    current_solution = neighbor
-                    current_score = neighbor_score
-
-            temperature *= self.cooling_rate
-            iteration += 1
-
-            # Optional progress reporting
-            if iteration % 1000 == 0:
-                print(f"Iteration {iteration}, Temperature: {temperature:.4f}, "
+        while iteration < n_iterations:
+            # Anneal in blocks of 1000 iterations to report progress between them
+            current_score, best_score, iteration = _sa_kernel.anneal(
+                self._sa_assign, self._rank, self._members, self._n_members,
+                self._contribution, self._n_invalid, self._used, self._overloaded,
+                *self._score_arrays(), movable, *self._candidates,
+                current_score, best, best_score, inverse_temperatures, iteration,
+                min(iteration + 1000, n_iterations), self._rng)
+
+            if self.verbose and iteration % 1000 == 0:
+                print(f"Iteration {iteration}, Temperature: {temperatures[iteration]:.4f}, "
                       f"Current Score: {current_score:.2f}, Best Score: {best_score:.2f}")
 
+        best_solution = {self._prog_ids[p]: self._tpm_ids[best[p]] for p in self._order}
+
         # Final validation
         if not self.validate_fixed_assignments_solution(best_solution):
             raise ValueError("Optimization failed to respect fixed assignments")
@@ -1,64 +1,72 @@
-from dataclasses import dataclass
 from typing import Dict
+import numpy as np
 from ..models import TPM, Program
-from ..utils.timezone import timezone_difference
+from ..utils.timezone import utc_offsets
+
+# Order of the values in Solution.metrics (lower is better)
+METRIC_NAMES = ('unused_tpms', 'overloaded_tpms', 'timezone_violations', 'portfolio_violations')
+
+def non_dominated(metrics: np.ndarray) -> np.ndarray:
+    """Mask of the rows of a (solutions x metrics) matrix no other row Pareto-dominates"""
+    no_worse = (metrics[:, np.newaxis, :] <= metrics[np.newaxis, :, :]).all(axis=2)
+    better = (metrics[:, np.newaxis, :] < metrics[np.newaxis, :, :]).any(axis=2)
+    # dominated[j] if some row i is no worse everywhere and better somewhere
+    return ~(no_worse & better).any(axis=0)
+
 
 class Solution:
+    __slots__ = ('assignments', 'tpms', 'programs', 'metrics')
+
     def __init__(self, assignments: Dict[str, str], tpms: Dict[str, TPM], programs: Dict[str, Program]):
         self.assignments = assignments
         self.tpms = tpms
         self.programs = programs
         self.metrics = self._calculate_metrics()
 
-    def _count_unused_tpms(self) -> int:
-        used_tpms = set(self.assignments.values())
-        return len(self.tpms) - len(used_tpms)
-
-    def _count_overloaded_tpms(self) -> int:
-        tpm_loads = {tpm_id: 0.0 for tpm_id in self.tpms}
-        for prog_id, tpm_id in self.assignments.items():
-            tpm_loads[tpm_id] += self.programs[prog_id].required_time
-
-        return sum(1 for tpm_id, load in tpm_loads.items()
-                   if not self.tpms[tpm_id].allow_overload
-                   and load > self.tpms[tpm_id].available_time)
-
-    def _count_timezone_violations(self) -> int:
-        violations = 0
-        for prog_id, tpm_id in self.assignments.items():
-            tz_diff = timezone_difference(self.tpms[tpm_id].timezone,
-                                      self.programs[prog_id].timezone)
-            if tz_diff > 6:
-                violations += 1
-        return violations
-
-    def _count_portfolio_violations(self) -> int:
-        tpm_portfolios = {}
-        for prog_id, tpm_id in self.assignments.items():
-            if tpm_id not in tpm_portfolios:
-                tpm_portfolios[tpm_id] = set()
-            tpm_portfolios[tpm_id].add(self.programs[prog_id].portfolio)
-
-        return sum(1 for portfolios in tpm_portfolios.values()
-                   if len(portfolios) > 2)
-
-    def _calculate_metrics(self) -> Dict[str, float]:
-        return {
-            'unused_tpms': self._count_unused_tpms(),
-            'overloaded_tpms': self._count_overloaded_tpms(),
-            'timezone_violations': self._count_timezone_violations(),
-            'portfolio_violations': self._count_portfolio_violations()
-        }
+    def _calculate_metrics(self) -> np.ndarray:
+        """Compute all metrics from one indexed pass over the assignments"""
+        tpm_idx = {tpm_id: t for t, tpm_id in enumerate(self.tpms)}
+        portfolio_idx = {}
+        n_tpms = len(tpm_idx)
+
+        assign = np.array([tpm_idx[tpm_id] for tpm_id in self.assignments.values()],
+                          dtype=np.int64)
+        programs = [self.programs[prog_id] for prog_id in self.assignments]
+        required_time = np.array([program.required_time for program in programs],
+                                 dtype=np.float64)
+        portfolio = np.array([portfolio_idx.setdefault(program.portfolio, len(portfolio_idx))
+                              for program in programs], dtype=np.int64)
+        available = np.array([tpm.available_time for tpm in self.tpms.values()])
+        allow_overload = np.array([tpm.allow_overload for tpm in self.tpms.values()], dtype=bool)
+
+        loads = np.bincount(assign, weights=required_time, minlength=n_tpms)
+        unused_tpms = n_tpms - np.unique(assign).size
+        overloaded_tpms = np.count_nonzero((loads > available) & ~allow_overload)
+
+        # Timezone differences from per-TPM and per-program UTC offsets
+        tpm_offset = utc_offsets([tpm.timezone for tpm in self.tpms.values()])
+        prog_offset = utc_offsets([program.timezone for program in programs])
+        timezone_violations = np.count_nonzero(np.abs(tpm_offset[assign] - prog_offset) > 6)
+
+        # Distinct (TPM, portfolio) pairs, counted per TPM
+        n_portfolios = max(len(portfolio_idx), 1)
+        tpm_portfolios = np.unique(assign * n_portfolios + portfolio)
+        portfolio_counts = np.bincount(tpm_portfolios // n_portfolios, minlength=n_tpms)
+        portfolio_violations = np.count_nonzero(portfolio_counts > 2)
+
+        return np.array([unused_tpms, overloaded_tpms, timezone_violations,
+                         portfolio_violations], dtype=np.float64)
+
+    @property
+    def metrics_dict(self) -> Dict[str, float]:
+        """Metrics keyed by name"""
+        return dict(zip(METRIC_NAMES, self.metrics.tolist()))
 
     def dominates(self, other: 'Solution') -> bool:
         """Returns True if this solution Pareto-dominates the other"""
-        at_least_one_better = False
-        for metric, value in self.metrics.items():
-            if value > other.metrics[metric]:  # Higher values are worse
-                return False
-            if value < other.metrics[metric]:
-                at_least_one_better = True
-        return at_least_one_better
+        # Higher values are worse
+        return bool((self.metrics <= other.metrics).all() and
+                    (self.metrics < other.metrics).any())
 
     def is_feasible(self) -> bool:
         """Check if solution satisfies hard constraints"""
@@ -69,7 +77,7 @@ class Solution:
                     return False
 
         # No overloaded TPMs unless allowed
-        if self._count_overloaded_tpms() > 0:
+        if self.metrics[METRIC_NAMES.index('overloaded_tpms')] > 0:
             return False
 
         return True
@@ -1,7 +1,7 @@
-from typing import Dict, List
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
 from .base import BaseOptimizer
 from ..models import TPM, Program
-from ..utils.timezone import timezone_difference
 
 
 class TwoPhaseOptimizer(BaseOptimizer):
@@ -19,28 +19,25 @@ class TwoPhaseOptimizer(BaseOptimizer):
     def _create_feasible_solution(self) -> Dict[str, str]:
         """Create initial solution prioritizing optimal load distribution"""
         solution = self.fixed_assignments.copy()
-        loads = self._calculate_tpm_loads(solution)
+        self._track(solution)
 
-        # Sort programs by complexity and size
+        # Programs by complexity and size
+        by_complexity = [self._prog_ids[p] for p in self._complexity_order]
         unassigned = [(prog_id, self.programs[prog_id])
-                      for prog_id in self.programs
-                      if prog_id not in solution]
-        unassigned.sort(key=lambda x: (x[1].complexity_score, x[1].required_time),
-                        reverse=True)
+                      for prog_id in by_complexity if prog_id not in solution]
 
         for prog_id, program in unassigned:
             # Rank all TPMs for this program
             tpm_rankings = []
             for tpm_id in self.tpms:
-                rank = self._rank_tpm_for_program(prog_id, tpm_id, loads)
+                rank = self._rank_tpm_for_program(prog_id, tpm_id, self._loads)
                 if rank > -float('inf'):
                     tpm_rankings.append((rank, tpm_id))
 
             if tpm_rankings:
                 # Choose highest ranked TPM
                 best_tpm = max(tpm_rankings, key=lambda x: x[0])[1]
-                solution[prog_id] = best_tpm
-                loads[best_tpm] = loads.get(best_tpm, 0) + program.required_time
+                self._move(prog_id, best_tpm, solution)
 
         return solution
 
@@ -63,29 +60,61 @@ class TwoPhaseOptimizer(BaseOptimizer):
 
     def _find_feasible_tpms(self, prog_id: str, current_solution: Dict[str, str]) -> List[str]:
         """Find all TPMs that can feasibly take this program"""
+        tpm_portfolios = self._calculate_tpm_portfolios(current_solution)
         return [tpm_id for tpm_id in self.tpms.keys()
-                if self._can_assign(prog_id, tpm_id, current_solution)]
+                if self._can_assign(prog_id, tpm_id, tpm_portfolios)]
 
-    def _can_assign(self, prog_id: str, tpm_id: str, solution: Dict[str, str]) -> bool:
-        """Check if assignment is feasible"""
+    def _calculate_tpm_portfolios(self, solution: Dict[str, str]) -> Dict[str, Counter]:
+        """Count the programs of each portfolio assigned to each TPM"""
+        tpm_portfolios = defaultdict(Counter)
+        for prog_id, tpm_id in solution.items():
+            tpm_portfolios[tpm_id][self.programs[prog_id].portfolio] += 1
+        return tpm_portfolios
+
+    def _can_assign(self, prog_id: str, tpm_id: str,
+                    tpm_portfolios: Optional[Dict[str, Counter]] = None) -> bool:
+        """Check if assignment is feasible; portfolios default to the tracked solution's"""
         if not self.validate_assignment(prog_id, tpm_id):
             return False
 
         # Check timezone spread
-        tz_diff = timezone_difference(self.tpms[tpm_id].timezone,
-                                      self.programs[prog_id].timezone)
-        if tz_diff > 6:
+        if self._tz_diff[self._tpm_idx[tpm_id], self._prog_idx[prog_id]] > 6:
             return False
 
         # Check portfolio limit
-        portfolios = set(self.programs[p].portfolio for p, t in solution.items()
-                         if t == tpm_id)
+        if tpm_portfolios is None:
+            tpm_portfolios = self._tpm_portfolios
+        portfolios = tpm_portfolios[tpm_id]
         if (self.programs[prog_id].portfolio not in portfolios and
                 len(portfolios) >= 2):
             return False
 
         return True
 
+    def _track(self, solution: Dict[str, str]) -> None:
+        """Start maintaining TPM loads, programs and portfolios per TPM for a solution"""
+        self._loads = self._calculate_tpm_loads(solution)
+        self._tpm_portfolios = self._calculate_tpm_portfolios(solution)
+        self._tpm_to_programs = {tpm_id: set() for tpm_id in self.tpms}
+        for prog_id, tpm_id in solution.items():
+            self._tpm_to_programs[tpm_id].add(prog_id)
+
+    def _move(self, prog_id: str, tpm_id: str, solution: Dict[str, str]) -> None:
+        """Assign a program to a TPM in solution, keeping the per-TPM tracking in sync"""
+        program = self.programs[prog_id]
+        old_tpm = solution.get(prog_id)
+        if old_tpm is not None:
+            self._loads[old_tpm] -= program.required_time
+            self._tpm_to_programs[old_tpm].discard(prog_id)
+            portfolios = self._tpm_portfolios[old_tpm]
+            portfolios[program.portfolio] -= 1
+            if not portfolios[program.portfolio]:
+                del portfolios[program.portfolio]
+        solution[prog_id] = tpm_id
+        self._loads[tpm_id] += program.required_time
+        self._tpm_to_programs[tpm_id].add(prog_id)
+        self._tpm_portfolios[tpm_id][program.portfolio] += 1
+
     def _calculate_tpm_loads(self, solution: Dict[str, str]) -> Dict[str, float]:
         """Calculate loads for all TPMs"""
         loads = {tpm_id: 0.0 for tpm_id in self.tpms}
@@ -99,16 +128,14 @@ class TwoPhaseOptimizer(BaseOptimizer):
         if prog_id in self.fixed_assignments:
             return False
 
-        # Create temporary solution with the move
-        temp_solution = solution.copy()
-        temp_solution[prog_id] = target_tpm
-
-        # Check if move maintains feasibility
-        if not self._can_assign(prog_id, target_tpm, temp_solution):
+        # Check if move maintains feasibility against the tracked portfolios
+        if not self._can_assign(prog_id, target_tpm):
             return False
 
         # Check if move would overload target
-        new_load = self._calculate_tpm_load(target_tpm, temp_solution)
+        new_load = self._loads[target_tpm]
+        if solution.get(prog_id) != target_tpm:
+            new_load += self.programs[prog_id].required_time
         if (not self.tpms[target_tpm].allow_overload and
                 new_load > self.tpms[target_tpm].available_time):
             return False
@@ -118,14 +145,13 @@ class TwoPhaseOptimizer(BaseOptimizer):
     def _fix_overloads(self, solution: Dict[str, str]) -> Dict[str, str]:
         """Fix any overloaded TPMs"""
         current = solution.copy()
-        loads = self._calculate_tpm_loads(current)
 
-        overloaded = [(tid, load) for tid, load in loads.items()
+        overloaded = [(tid, load) for tid, load in self._loads.items()
                       if load > 1.0 and not self.tpms[tid].allow_overload]
         overloaded.sort(key=lambda x: x[1], reverse=True)
 
         for over_tpm, _ in overloaded:
-            self._redistribute_load(current, over_tpm, loads)
+            self._redistribute_load(current, over_tpm)
 
         return current
 
@@ -137,25 +163,24 @@ class TwoPhaseOptimizer(BaseOptimizer):
         """Optimize load distribution within acceptable range"""
         return solution  # Simplified for now
 
-    def _redistribute_load(self, solution: Dict[str, str],
-                           from_tpm: str, loads: Dict[str, float]) -> None:
+    def _redistribute_load(self, solution: Dict[str, str], from_tpm: str) -> None:
         """Helper method to redistribute load from overloaded TPM"""
-        programs_to_move = [(p, self.programs[p].required_time)
-                            for p, t in solution.items()
-                            if t == from_tpm and p not in self.fixed_assignments]
-        programs_to_move.sort(key=lambda x: x[1])
+        loads = self._loads
+        # Ties keep the programs' order in the solution
+        position = {prog_id: i for i, prog_id in enumerate(solution)}
+        programs_to_move = sorted(
+            (p for p in self._tpm_to_programs[from_tpm] if p not in self.fixed_assignments),
+            key=lambda p: (self.programs[p].required_time, position[p]))
 
         other_tpms = [(tid, load) for tid, load in loads.items()
                       if tid != from_tpm and
                       (self.tpms[tid].allow_overload or load < 1.0)]
         other_tpms.sort(key=lambda x: x[1])
 
-        for prog_id, _ in programs_to_move:
+        for prog_id in programs_to_move:
             for target_tpm, _ in other_tpms:
                 if self.validate_assignment(prog_id, target_tpm):
-                    solution[prog_id] = target_tpm
-                    loads[from_tpm] -= self.programs[prog_id].required_time
-                    loads[target_tpm] += self.programs[prog_id].required_time
+                    self._move(prog_id, target_tpm, solution)
                     if loads[from_tpm] <= 1.0:
                         return
 
@@ -184,7 +209,7 @@ class TwoPhaseOptimizer(BaseOptimizer):
             return -float('inf')
 
         # Timezone match
-        tz_diff = timezone_difference(tpm.timezone, program.timezone)
+        tz_diff = self._tz_diff[self._tpm_idx[tpm_id], self._prog_idx[prog_id]]
         if tz_diff <= 3:
             score += 50
         elif tz_diff <= 6:
@@ -1,5 +1,8 @@
 import pandas as pd
-from typing import Dict
+from typing import Dict, Optional
+
+# Numeric report columns are kept as numbers and only formatted for display
+FORMATTERS = {'Required Time': '{:.1f}'.format}
 
 
 def print_assignment_report(
@@ -8,25 +11,32 @@ def print_assignment_report(
         utilization_df: pd.DataFrame,
         metrics: Dict[str, float],
         total_programs: int,
-        total_assignments: int
+        total_assignments: int,
+        max_rows: Optional[int] = None
 ) -> None:
-    """Print formatted assignment report to console"""
+    """Print formatted assignment report to console.
+
+    Tables longer than max_rows are truncated to their first and last rows;
+    by default every row is printed.
+    """
 
     print("\n=== TPM Assignments ===")
     if not assignments_df.empty:
-        print(assignments_df.to_string(index=False))
+        print(assignments_df.to_string(index=False, formatters=FORMATTERS,
+                                        max_rows=max_rows))
     else:
         print("No assignments made.")
 
     print("\n=== Unassigned Programs ===")
     if not unassigned_df.empty:
-        print(unassigned_df.to_string(index=False))
+        print(unassigned_df.to_string(index=False, formatters=FORMATTERS,
+                                       max_rows=max_rows))
     else:
         print("No unassigned programs!")
 
     print("\n=== TPM Utilization ===")
     if not utilization_df.empty:
-        print(utilization_df.to_string(index=False))
+        print(utilization_df.to_string(index=False, max_rows=max_rows))
     else:
         print("No TPM utilization data available.")
 
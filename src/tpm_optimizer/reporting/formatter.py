@@ -1,37 +1,42 @@
+import re
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from typing import Dict, Tuple, Set
 from ..models import TPM, Program
 from ..optimizers import BaseOptimizer
-from ..utils.timezone import timezone_difference
 from .metrics import calculate_summary_metrics
 
 
+# Common abbreviations
+ABBREVIATIONS = {
+    'Machine Learning': 'ML',
+    'Lifecycle': 'LC',
+    'Authentication': 'Auth',
+    'Authorization': 'Auth',
+    'Private Label Solutions': 'PLS',
+    'Technical Program Manager': 'TPM',
+    'Recommendations': 'Recs',
+    'Management': 'Mgmt',
+    'Platform': 'Plat',
+    'Generation': 'Gen',
+    'Intelligence': 'Intel',
+    'Integration': 'Int',
+    'Development': 'Dev'
+}
+# All abbreviations applied in a single scan, longest phrase first
+ABBREVIATION_PATTERN = re.compile('|'.join(
+    re.escape(full) for full in sorted(ABBREVIATIONS, key=len, reverse=True)))
+
+
+@lru_cache(maxsize=4096)
 def shorten_name(name: str, max_length: int = 30) -> str:
     """Shorten a name intelligently while keeping it recognizable"""
     if len(name) <= max_length:
         return name
 
-    # Common abbreviations
-    abbreviations = {
-        'Machine Learning': 'ML',
-        'Lifecycle': 'LC',
-        'Authentication': 'Auth',
-        'Authorization': 'Auth',
-        'Private Label Solutions': 'PLS',
-        'Technical Program Manager': 'TPM',
-        'Recommendations': 'Recs',
-        'Management': 'Mgmt',
-        'Platform': 'Plat',
-        'Generation': 'Gen',
-        'Intelligence': 'Intel',
-        'Integration': 'Int',
-        'Development': 'Dev'
-    }
-
     # Apply abbreviations
-    shortened = name
-    for full, abbr in abbreviations.items():
-        shortened = shortened.replace(full, abbr)
+    shortened = ABBREVIATION_PATTERN.sub(lambda match: ABBREVIATIONS[match.group()], name)
 
     # If still too long, truncate with ellipsis
     if len(shortened) > max_length:
@@ -40,80 +45,103 @@ def shorten_name(name: str, max_length: int = 30) -> str:
     return shortened
 
 
+ASSIGNMENT_COLUMNS = ['Program ID', 'Program Name', 'Required Time', 'TPM Name', 'Fixed',
+                      'Timezone Match', 'Time Allocation']
+UNASSIGNED_COLUMNS = ['Program ID', 'Program Name', 'Required Time', 'Timezone']
+UTILIZATION_COLUMNS = ['TPM ID', 'TPM Name', 'Total Capacity', 'Used Capacity',
+                       'Remaining Capacity', 'Utilization %', 'Program Count', 'Timezone',
+                       'Portfolio Diversity']
+
+
+def _append_row(columns: Dict[str, list], *values) -> None:
+    """Append one row's values, in column order, to column-wise lists"""
+    for column, value in zip(columns.values(), values):
+        column.append(value)
+
+
+def _sort_rows(columns: Dict[str, list], *keys: str) -> None:
+    """Reorder column-wise lists in place so rows are sorted by the key columns"""
+    sort_keys = list(zip(*(columns[key] for key in keys)))
+    order = sorted(range(len(sort_keys)), key=sort_keys.__getitem__)
+    for values in columns.values():
+        values[:] = [values[i] for i in order]
+
+
 def generate_assignment_report(
         optimizer: BaseOptimizer
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Dict[str, float]]:
     """Generate detailed tabular reports of assignments and TPM utilization"""
-    assignment_data = []
-    unassigned_data = []
-    utilization_data = []
+    # Reports are accumulated column-wise and built from column dicts
+    assignment_data = {column: [] for column in ASSIGNMENT_COLUMNS}
+    unassigned_data = {column: [] for column in UNASSIGNED_COLUMNS}
+    utilization_data = {column: [] for column in UTILIZATION_COLUMNS}
+
+    # Every value below comes from one snapshot of the optimizer's assignments,
+    # which may have been edited in place
+    prog_tpm, tz_diffs, tpm_loads, portfolio_counts = optimizer.assignment_state()
+    assigned_p = np.flatnonzero(prog_tpm >= 0)
+    tpm_ids = list(optimizer.tpms)
 
     total_programs = len(optimizer.programs)
-    assigned_programs_count = len(optimizer.assignments)
+    assigned_programs_count = len(assigned_p)
     total_timezone_spread = 0
     respected_timezones = 0
+    tz_diffs = tz_diffs.tolist()
+
+    # Each TPM's capacity is formatted once for the time allocation column
+    capacity_text = {tpm_id: f"{tpm.available_time:.1f}" for tpm_id, tpm in optimizer.tpms.items()}
 
     # Process assignments
-    for prog_id, program in optimizer.programs.items():
-        tpm_id = optimizer.assignments.get(prog_id)
-        if tpm_id:
+    for p, (prog_id, program) in enumerate(optimizer.programs.items()):
+        t = prog_tpm[p]
+        program_name = shorten_name(program.name)
+        required_time = program.required_time
+        if t >= 0:
+            tpm_id = tpm_ids[t]
             tpm = optimizer.tpms[tpm_id]
-            tz_diff = timezone_difference(tpm.timezone, program.timezone)
+            tz_diff = tz_diffs[p]
             total_timezone_spread += tz_diff
             if tz_diff <= 3:
                 respected_timezones += 1
 
             is_fixed = prog_id in optimizer.fixed_assignments
-            assignment_data.append({
-                'Program ID': prog_id,
-                'Program Name': shorten_name(program.name),
-                'Required Time': f"{program.required_time:.1f}",
-                'TPM Name': tpm.name,
-                'Fixed': 'Yes' if is_fixed else 'No',
-                'Timezone Match': 'Yes' if tz_diff <= 3.0 else 'No',
-                'Time Allocation': f"{program.required_time:.1f}/{tpm.available_time:.1f}"
-            })
+            _append_row(assignment_data,
+                        prog_id,
+                        program_name,
+                        required_time,
+                        tpm.name,
+                        'Yes' if is_fixed else 'No',
+                        'Yes' if tz_diff <= 3.0 else 'No',
+                        f"{required_time:.1f}/{capacity_text[tpm_id]}")
         else:
-            unassigned_data.append({
-                'Program ID': prog_id,
-                'Program Name': shorten_name(program.name),
-                'Required Time': f"{program.required_time:.1f}",
-                'Timezone': program.timezone
-            })
-
-    # Calculate TPM utilization
-    portfolio_diversity = {}
-    for tpm_id, tpm in optimizer.tpms.items():
-        assigned_programs = [p for p in optimizer.assignments if optimizer.assignments[p] == tpm_id]
-        total_allocated = sum(optimizer.programs[p].required_time for p in assigned_programs)
-        portfolio_diversity[tpm_id] = len(set(optimizer.programs[p].portfolio for p in assigned_programs))
-
-        utilization_data.append({
-            'TPM ID': tpm_id,
-            'TPM Name': tpm.name,
-            'Total Capacity': round(tpm.available_time, 1),
-            'Used Capacity': round(total_allocated, 1),
-            'Remaining Capacity': round(max(0, tpm.available_time - total_allocated), 1),
-            'Utilization %': round((total_allocated / tpm.available_time * 100) if tpm.available_time > 0 else 0, 1),
-            'Program Count': len(assigned_programs),
-            'Timezone': tpm.timezone,
-            'Portfolio Diversity': portfolio_diversity[tpm_id]
-        })
-
-    # Create DataFrames
-    assignments_df = pd.DataFrame(assignment_data)
-    if not assignments_df.empty:
-        assignments_df = assignments_df.sort_values(['TPM Name', 'Program ID'])
-
-    unassigned_df = pd.DataFrame(unassigned_data)
-    if not unassigned_df.empty:
-        unassigned_df = unassigned_df.sort_values('Program ID')
-    else:
-        unassigned_df = pd.DataFrame(columns=['Program ID', 'Program Name', 'Required Time', 'Timezone'])
-
-    utilization_df = pd.DataFrame(utilization_data)
-    if not utilization_df.empty:
-        utilization_df = utilization_df.sort_values('TPM Name')
+            _append_row(unassigned_data, prog_id, program_name, required_time, program.timezone)
+
+    # Calculate TPM utilization from the optimizer's per-TPM state arrays
+    program_counts = np.bincount(prog_tpm[assigned_p], minlength=len(optimizer.tpms))
+    for t, (tpm_id, tpm) in enumerate(optimizer.tpms.items()):
+        total_allocated = float(tpm_loads[t])
+
+        _append_row(utilization_data,
+                    tpm_id,
+                    tpm.name,
+                    round(tpm.available_time, 1),
+                    round(total_allocated, 1),
+                    round(max(0.0, tpm.available_time - total_allocated), 1),
+                    round((total_allocated / tpm.available_time * 100) if tpm.available_time > 0 else 0, 1),
+                    int(program_counts[t]),
+                    tpm.timezone,
+                    int(portfolio_counts[t]))
+
+    # Sort the rows while they are still plain lists, then create DataFrames;
+    # the two-valued flag columns are categorical
+    _sort_rows(assignment_data, 'TPM Name', 'Program ID')
+    _sort_rows(unassigned_data, 'Program ID')
+    _sort_rows(utilization_data, 'TPM Name')
+    for column in ('Fixed', 'Timezone Match'):
+        assignment_data[column] = pd.Categorical(assignment_data[column], categories=['No', 'Yes'])
+    assignments_df = pd.DataFrame(assignment_data, copy=False)
+    unassigned_df = pd.DataFrame(unassigned_data, copy=False)
+    utilization_df = pd.DataFrame(utilization_data, copy=False)
 
     # Calculate metrics
     metrics = calculate_summary_metrics(
@@ -121,8 +149,8 @@ def generate_assignment_report(
         assigned_count=assigned_programs_count,
         total_timezone_spread=total_timezone_spread,
         respected_timezones=respected_timezones,
-        portfolio_diversity=portfolio_diversity,
-        utilization_df=utilization_df
+        portfolio_counts=portfolio_counts,
+        utilizations=np.array(utilization_data['Utilization %'], dtype=np.float64)
     )
 
     return assignments_df, unassigned_df, utilization_df, metrics
\ No newline at end of file
@@ -1,5 +1,5 @@
-from typing import Dict, Set
-import pandas as pd
+from typing import Dict
+import numpy as np
 
 
 def calculate_summary_metrics(
@@ -7,16 +7,16 @@ def calculate_summary_metrics(
         assigned_count: int,
         total_timezone_spread: float,
         respected_timezones: int,
-        portfolio_diversity: Dict[str, int],
-        utilization_df: pd.DataFrame
+        portfolio_counts: np.ndarray,
+        utilizations: np.ndarray
 ) -> Dict[str, float]:
-    """Calculate summary metrics for the assignment solution"""
+    """Calculate summary metrics for the assignment solution from per-TPM
+    portfolio counts and utilization percentages"""
 
     assignment_coverage = assigned_count / total_programs if total_programs > 0 else 0
     avg_timezone_spread = total_timezone_spread / assigned_count if assigned_count > 0 else 0
-    avg_portfolio_diversity = (sum(portfolio_diversity.values()) /
-                               len(portfolio_diversity) if portfolio_diversity else 0)
-    avg_tpm_utilization = utilization_df['Utilization %'].mean() if not utilization_df.empty else 0
+    avg_portfolio_diversity = float(np.mean(portfolio_counts)) if len(portfolio_counts) else 0
+    avg_tpm_utilization = float(np.mean(utilizations)) if len(utilizations) else 0
     timezone_respect_percentage = (respected_timezones / assigned_count * 100
                                    if assigned_count > 0 else 0)
 
@@ -1,17 +1,24 @@
 from .timezone import (
     timezone_difference,
     tz_to_utc_offset,
-    calculate_timezone_score
+    utc_offsets,
+    program_utc_offset,
+    calculate_timezone_score,
+    calculate_timezone_scores
 )
-from .scoring import calculate_level_score
+from .scoring import calculate_level_score, level_scores
 from .data_loader import load_data
 from .validator import DataValidator
 
 __all__ = [
     'timezone_difference',
     'tz_to_utc_offset',
+    'utc_offsets',
+    'program_utc_offset',
     'calculate_timezone_score',
+    'calculate_timezone_scores',
     'calculate_level_score',
+    'level_scores',
     'load_data',
     'DataValidator'
 ]
\ No newline at end of file
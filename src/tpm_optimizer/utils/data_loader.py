@@ -1,52 +1,105 @@
+import sys
 import pandas as pd
-from typing import Dict, Tuple, Set
+from typing import Dict, List, Tuple, Set
 from ..models import TPM, Program
+from .validator import DataValidator
+
+# Text columns are read as strings so ids such as "001" survive parsing and
+# fixed/desired program references match the ids they point to
+TPM_TEXT_COLUMNS = ['id', 'name', 'timezone', 'skills', 'conflicts', 'allow_overload',
+                    'fixed_program', 'desired_programs']
+PROGRAM_TEXT_COLUMNS = ['id', 'name', 'timezone', 'required_skills', 'fixed_tpm',
+                        'stakeholder_timezones', 'portfolio']
+# Numeric columns are parsed straight to float by the C parser; empty cells
+# become NaN and take their default afterwards
+TPM_NUMERIC_COLUMNS = ['available_time', 'level']
+PROGRAM_NUMERIC_COLUMNS = ['required_time', 'required_level', 'complexity_score']
+TRUE_VALUES = ['true', '1', 'yes', 't', 'y']
+
+
+def _read_csv(path: str, text_columns: List[str], numeric_columns: List[str]) -> pd.DataFrame:
+    dtype = {column: str for column in text_columns}
+    dtype.update({column: 'float64' for column in numeric_columns})
+    return pd.read_csv(path, dtype=dtype, engine='c')
+
+
+def _text(df: pd.DataFrame, column: str, default=None) -> List:
+    """Column values with missing or empty cells replaced by default"""
+    if column not in df:
+        return [default] * len(df)
+    return [value if isinstance(value, str) and value != '' else default
+            for value in df[column].tolist()]
+
+
+def _keys(df: pd.DataFrame, column: str, default=None) -> List:
+    """_text for columns of ids, timezones and portfolios, which repeat across
+    rows and are used as dict and set keys; the strings are interned"""
+    return [sys.intern(value) if value is not None else None
+            for value in _text(df, column, default)]
+
+
+def _numbers(df: pd.DataFrame, column: str, default, dtype) -> List:
+    """Numeric column values with missing cells replaced by default"""
+    if column not in df:
+        return [default] * len(df)
+    return df[column].fillna(default).astype(dtype).tolist()
+
+
+def _flags(df: pd.DataFrame, column: str) -> List[bool]:
+    """Boolean column values; missing cells are False"""
+    if column not in df:
+        return [False] * len(df)
+    return df[column].str.lower().isin(TRUE_VALUES).tolist()
+
+
+def _sets(df: pd.DataFrame, column: str) -> List[Set[str]]:
+    """Comma-separated column values as sets of interned strings"""
+    return [set(map(sys.intern, value.split(','))) if value else set()
+            for value in _text(df, column)]
 
 
 def load_data(tpms_file: str, programs_file: str) -> Tuple[Dict[str, TPM], Dict[str, Program]]:
     """Load TPM and Program data from CSV files"""
-    tpms_df = pd.read_csv(tpms_file)
-    programs_df = pd.read_csv(programs_file)
+    tpms_df = _read_csv(tpms_file, TPM_TEXT_COLUMNS, TPM_NUMERIC_COLUMNS)
+    programs_df = _read_csv(programs_file, PROGRAM_TEXT_COLUMNS, PROGRAM_NUMERIC_COLUMNS)
 
-    def split_if_string(value) -> Set[str]:
-        return set(value.split(',')) if isinstance(value, str) else set()
+    # Model fields, column-wise
+    tpm_columns = {
+        'id': _keys(tpms_df, 'id'),
+        'name': _text(tpms_df, 'name', ''),
+        'timezone': _keys(tpms_df, 'timezone', 'UTC'),
+        'skills': _sets(tpms_df, 'skills'),
+        'available_time': _numbers(tpms_df, 'available_time', 0, float),
+        'level': _numbers(tpms_df, 'level', 1, int),
+        'conflicts': _sets(tpms_df, 'conflicts'),
+        'allow_overload': _flags(tpms_df, 'allow_overload'),
+        'fixed_program': _keys(tpms_df, 'fixed_program'),
+        'desired_programs': _sets(tpms_df, 'desired_programs'),
+    }
+    program_columns = {
+        'id': _keys(programs_df, 'id'),
+        'name': _text(programs_df, 'name', ''),
+        'timezone': _keys(programs_df, 'timezone', 'UTC'),
+        'required_skills': _sets(programs_df, 'required_skills'),
+        'required_time': _numbers(programs_df, 'required_time', 0, float),
+        'required_level': _numbers(programs_df, 'required_level', 1, int),
+        'fixed_tpm': _keys(programs_df, 'fixed_tpm'),
+        'stakeholder_timezones': _sets(programs_df, 'stakeholder_timezones'),
+        'complexity_score': _numbers(programs_df, 'complexity_score', 1, int),
+        'portfolio': _keys(programs_df, 'portfolio', ''),
+    }
 
-    def safe_get(row, key, default=None):
-        value = row[key] if key in row and pd.notna(row[key]) else default
-        return value if value != '' else default
+    # Report every invalid row at once, before building any model
+    DataValidator.validate_columns(tpm_columns, program_columns)
 
     tpms = {}
-    for _, row in tpms_df.iterrows():
-        allow_overload_value = str(safe_get(row, 'allow_overload', '')).lower()
-        allow_overload = allow_overload_value in ['true', '1', 'yes', 't', 'y']
-
-        tpm = TPM(
-            id=str(row['id']),
-            name=safe_get(row, 'name', ''),
-            timezone=safe_get(row, 'timezone', 'UTC'),
-            skills=split_if_string(safe_get(row, 'skills', '')),
-            available_time=float(safe_get(row, 'available_time', 0)),
-            level=int(safe_get(row, 'level', 1)),
-            conflicts=split_if_string(safe_get(row, 'conflicts', '')),
-            allow_overload=allow_overload,
-            fixed_program=safe_get(row, 'fixed_program'),
-            desired_programs=split_if_string(safe_get(row, 'desired_programs', ''))
-        )
-        tpms[str(row['id'])] = tpm
+    for row in zip(*tpm_columns.values()):
+        tpm = TPM(**dict(zip(tpm_columns, row)))
+        tpms[tpm.id] = tpm
 
     programs = {}
-    for _, row in programs_df.iterrows():
-        programs[str(row['id'])] = Program(
-            id=str(row['id']),
-            name=safe_get(row, 'name', ''),
-            timezone=safe_get(row, 'timezone', 'UTC'),
-            required_skills=split_if_string(safe_get(row, 'required_skills', '')),
-            required_time=float(safe_get(row, 'required_time', 0)),
-            required_level=int(safe_get(row, 'required_level', 1)),
-            fixed_tpm=str(safe_get(row, 'fixed_tpm')) if pd.notna(row.get('fixed_tpm')) else None,
-            stakeholder_timezones=split_if_string(safe_get(row, 'stakeholder_timezones', '')),
-            complexity_score=int(safe_get(row, 'complexity_score', 1)),
-            portfolio=safe_get(row, 'portfolio', '')
-        )
+    for row in zip(*program_columns.values()):
+        program = Program(**dict(zip(program_columns, row)))
+        programs[program.id] = program
 
     return tpms, programs
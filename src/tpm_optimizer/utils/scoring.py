@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calculate_level_score(tpm_level: int, required_level: int) -> float:
     if tpm_level == required_level:
         return 1.0
@@ -6,4 +9,11 @@ def calculate_level_score(tpm_level: int, required_level: int) -> float:
     elif tpm_level > required_level + 1:
         return 0.4
     else:
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+
+def level_scores(tpm_levels: np.ndarray, required_levels: np.ndarray) -> np.ndarray:
+    """calculate_level_score over arrays of levels, broadcast against each other"""
+    difference = np.subtract(tpm_levels, required_levels)
+    return np.select([difference == 0, difference == 1, difference > 1],
+                     [1.0, 0.7, 0.4], 0.0)
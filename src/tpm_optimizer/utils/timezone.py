@@ -1,7 +1,15 @@
-from datetime import datetime
-import pytz
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Optional, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+import numpy as np
 from ..models import Program
 
+# Every offset is taken at this one instant, so offsets resolved at different
+# times in a long run still agree across a DST change
+REFERENCE_TIME = datetime.now(timezone.utc)
+
 
 def tz_to_utc_offset(tz_str: str) -> float:
     """Calculate UTC offset for a timezone
@@ -12,17 +20,37 @@ def tz_to_utc_offset(tz_str: str) -> float:
     Returns:
         float: UTC offset in hours
     """
-    if not tz_str:
-        tz_str = 'UTC'
+    return _utc_offset(tz_str if tz_str else 'UTC')
+
+
+def utc_offsets(timezones: Sequence[str]) -> np.ndarray:
+    """UTC offsets, in hours, of a sequence of timezones as a float array"""
+    return np.fromiter((tz_to_utc_offset(tz) for tz in timezones), dtype=np.float64,
+                       count=len(timezones))
+
+
+@lru_cache(maxsize=None)
+def _utc_offset(tz_str: str) -> float:
+    """UTC offset of a timezone, resolved once per process"""
     try:
-        tz = pytz.timezone(tz_str)
-        naive_dt = datetime.now().replace(tzinfo=None)
-        offset = tz.utcoffset(naive_dt).total_seconds() / 3600
-        return offset
-    except pytz.exceptions.UnknownTimeZoneError:
-        return 0.0  # Default to UTC for unknown timezones
+        tz = ZoneInfo(tz_str)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        # Zone names match case-insensitively, as they did with pytz; names
+        # of tzdata directories such as 'America' raise OSError
+        name = _zone_names().get(tz_str.lower())
+        if name is None:
+            return 0.0  # Default to UTC for unknown timezones
+        tz = ZoneInfo(name)
+    return REFERENCE_TIME.astimezone(tz).utcoffset().total_seconds() / 3600
+
 
+@lru_cache(maxsize=1)
+def _zone_names() -> Dict[str, str]:
+    """Canonical zone names by lowercase name"""
+    return {name.lower(): name for name in available_timezones()}
 
+
+@lru_cache(maxsize=4096)
 def timezone_difference(tz1: str, tz2: str) -> float:
     """Calculate absolute hour difference between two timezones
 
@@ -42,6 +70,27 @@ def timezone_difference(tz1: str, tz2: str) -> float:
     return abs(offset1 - offset2)
 
 
+def program_utc_offset(program: Program) -> Optional[float]:
+    """Mean UTC offset of a program's own and stakeholder timezones
+
+    Args:
+        program: Program object with timezone and stakeholder_timezones
+
+    Returns:
+        Optional[float]: Mean offset in hours, or None if the program has no timezones
+    """
+    # Running sum over the program's timezones, skipping empty ones
+    total = 0
+    count = 0
+    for tz in chain((program.timezone,), program.stakeholder_timezones):
+        if tz:
+            total += _utc_offset(tz)
+            count += 1
+    if not count:
+        return None
+    return total / count
+
+
 def calculate_timezone_score(tpm_timezone: str, program: Program) -> float:
     """Calculate timezone compatibility score for a TPM and program
 
@@ -55,16 +104,13 @@ def calculate_timezone_score(tpm_timezone: str, program: Program) -> float:
                0.5 = acceptable match (≤6 hours difference)
                0.0 = poor match (>6 hours difference)
     """
-    # Filter out empty timezone strings and ensure we have at least one timezone
-    program_timezones = [tz for tz in ([program.timezone] + list(program.stakeholder_timezones)) if tz]
-    if not program_timezones:
+    barycenter = program_utc_offset(program)
+    if barycenter is None:
         return 1.0  # If no timezone requirements, consider it a perfect match
 
     # Use UTC for empty TPM timezone
     tpm_timezone = tpm_timezone if tpm_timezone else 'UTC'
 
-    offsets = [tz_to_utc_offset(tz) for tz in program_timezones]
-    barycenter = sum(offsets) / len(offsets)
     tpm_offset = tz_to_utc_offset(tpm_timezone)
     diff = abs(tpm_offset - barycenter)
 
@@ -73,4 +119,19 @@ def calculate_timezone_score(tpm_timezone: str, program: Program) -> float:
     elif diff <= 6:
         return 0.5
     else:
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+
+def calculate_timezone_scores(tpm_offsets: np.ndarray, program_offsets: np.ndarray) -> np.ndarray:
+    """Timezone compatibility scores for every TPM and program pair
+
+    Args:
+        tpm_offsets: UTC offset of each TPM
+        program_offsets: Mean UTC offset of each program (see program_utc_offset),
+                         NaN for programs without timezones
+
+    Returns:
+        np.ndarray: TPMs x programs scores, as calculate_timezone_score
+    """
+    diff = np.abs(tpm_offsets[:, np.newaxis] - program_offsets[np.newaxis, :])
+    return np.where(np.isnan(diff) | (diff <= 3), 1.0, np.where(diff <= 6, 0.5, 0.0))
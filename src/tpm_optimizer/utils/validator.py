@@ -1,3 +1,5 @@
+from typing import Dict, List
+import numpy as np
 from ..models import TPM, Program
 
 
@@ -5,18 +7,94 @@ class DataValidator:
     @staticmethod
     def validate_tpm(tpm: TPM):
         """Validate TPM data"""
-        assert isinstance(tpm.id, str), "TPM ID must be a string"
-        assert 0 <= tpm.available_time <= 1, "Available time must be between 0 and 1"
-        assert 1 <= tpm.level <= 5, "TPM level must be between 1 and 5"
-        assert isinstance(tpm.timezone, str), "Timezone must be a string"
-        if tpm.available_time > 1:
-            print(f"Warning: TPM {tpm.id} ({tpm.name}) has capacity > 1: {tpm.available_time}")
+        if not isinstance(tpm.id, str):
+            raise ValueError("TPM ID must be a string")
+        if not 0 <= tpm.available_time <= 1:
+            raise ValueError("Available time must be between 0 and 1")
+        if not 1 <= tpm.level <= 5:
+            raise ValueError("TPM level must be between 1 and 5")
+        if not isinstance(tpm.timezone, str):
+            raise ValueError("Timezone must be a string")
 
     @staticmethod
     def validate_program(program: Program):
         """Validate Program data"""
-        assert isinstance(program.id, str), "Program ID must be a string"
-        assert 0 < program.required_time <= 1, "Required time must be between 0 and 1"
-        assert 1 <= program.required_level <= 5, "Required level must be between 1 and 5"
-        assert isinstance(program.timezone, str), "Timezone must be a string"
-        assert 1 <= program.complexity_score <= 5, "Complexity score must be between 1 and 5"
\ No newline at end of file
+        if not isinstance(program.id, str):
+            raise ValueError("Program ID must be a string")
+        if not 0 < program.required_time <= 1:
+            raise ValueError("Required time must be between 0 and 1")
+        if not 1 <= program.required_level <= 5:
+            raise ValueError("Required level must be between 1 and 5")
+        if not isinstance(program.timezone, str):
+            raise ValueError("Timezone must be a string")
+        if not 1 <= program.complexity_score <= 5:
+            raise ValueError("Complexity score must be between 1 and 5")
+
+    @staticmethod
+    def validate_columns(tpm_columns: Dict[str, list], program_columns: Dict[str, list]):
+        """Validate column-wise TPM and program fields in one batch, raising once
+        with every problem"""
+        errors = DataValidator.collect_columns(tpm_columns, program_columns)
+        if errors:
+            raise ValueError(DataValidator.error_message(errors))
+
+    @staticmethod
+    def collect_columns(tpm_columns: Dict[str, list],
+                        program_columns: Dict[str, list]) -> List[str]:
+        """Check column-wise TPM and program fields, e.g. straight from a CSV load
+        before any model is built, and return every problem found"""
+        errors = []
+
+        def report(ids: List[str], failed, message: str):
+            errors.extend(f"{ids[i]}: {message}" for i in np.flatnonzero(np.asarray(failed, dtype=bool)))
+
+        tpm_ids = tpm_columns['id']
+        prog_ids = program_columns['id']
+        tpm_labels = [f"TPM {tpm_id}" for tpm_id in tpm_ids]
+        available = np.array(tpm_columns['available_time'], dtype=float)
+        level = np.array(tpm_columns['level'], dtype=float)
+        report(tpm_labels, [not isinstance(tpm_id, str) for tpm_id in tpm_columns['id']],
+               "TPM ID must be a string")
+        report(tpm_labels, ~((0 <= available) & (available <= 1)),
+               "Available time must be between 0 and 1")
+        report(tpm_labels, ~((1 <= level) & (level <= 5)), "TPM level must be between 1 and 5")
+        report(tpm_labels, [not isinstance(tz, str) for tz in tpm_columns['timezone']],
+               "Timezone must be a string")
+        report(tpm_labels, _repeated(tpm_columns['id']), "Duplicate TPM ID")
+
+        prog_labels = [f"Program {prog_id}" for prog_id in prog_ids]
+        required_time = np.array(program_columns['required_time'], dtype=float)
+        required_level = np.array(program_columns['required_level'], dtype=float)
+        complexity = np.array(program_columns['complexity_score'], dtype=float)
+        report(prog_labels, [not isinstance(prog_id, str) for prog_id in program_columns['id']],
+               "Program ID must be a string")
+        report(prog_labels, ~((0 < required_time) & (required_time <= 1)),
+               "Required time must be between 0 and 1")
+        report(prog_labels, ~((1 <= required_level) & (required_level <= 5)),
+               "Required level must be between 1 and 5")
+        report(prog_labels, [not isinstance(tz, str) for tz in program_columns['timezone']],
+               "Timezone must be a string")
+        report(prog_labels, ~((1 <= complexity) & (complexity <= 5)),
+               "Complexity score must be between 1 and 5")
+        report(prog_labels, _repeated(program_columns['id']), "Duplicate program ID")
+        known_tpms = set(tpm_ids)
+        report(prog_labels, [bool(tpm_id) and tpm_id not in known_tpms
+                             for tpm_id in program_columns['fixed_tpm']],
+               "Fixed TPM does not exist")
+
+        return errors
+
+    @staticmethod
+    def error_message(errors: List[str]) -> str:
+        """Format collected errors as one message"""
+        return "Invalid input data:\n" + "\n".join(f"  - {error}" for error in errors)
+
+
+def _repeated(ids: List[str]) -> List[bool]:
+    """Flag every occurrence of an id after its first"""
+    seen = set()
+    flags = []
+    for value in ids:
+        flags.append(value in seen)
+        seen.add(value)
+    return flags
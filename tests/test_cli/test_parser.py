@@ -11,6 +11,7 @@ def test_parser_creation():
     assert args.tpms_file == 'tpms.csv'  # Default TPMs file
     assert args.programs_file == 'programs.csv'  # Default programs file
     assert not args.verbose  # Default verbose setting
+    assert args.max_rows is None  # Tables are printed in full
 
 
 def test_parser_method_choices():
@@ -1,5 +1,7 @@
 import pytest
+import numpy as np
 from src.tpm_optimizer.optimizers import BaseOptimizer
+from src.tpm_optimizer.utils import calculate_timezone_score, timezone_difference
 
 
 def test_base_optimizer(sample_tpms, sample_programs):
@@ -11,4 +13,73 @@ def test_base_optimizer(sample_tpms, sample_programs):
 
     # Test fixed assignment validation
     solution = {"PROG001": "TPM001"}
-    assert optimizer.validate_fixed_assignments_solution(solution)
\ No newline at end of file
+    assert optimizer.validate_fixed_assignments_solution(solution)
+
+def test_validate_assignment_tracks_state(sample_tpms, sample_programs):
+    """Test that capacity checks follow assignment changes"""
+    sample_tpms["TPM001"].available_time = 0.6
+    optimizer = BaseOptimizer(sample_tpms, sample_programs)
+
+    optimizer.assignments = {"PROG001": "TPM001"}
+    assert not optimizer.validate_assignment("PROG002", "TPM001")
+    # A program never counts against its own TPM's load
+    assert optimizer.validate_assignment("PROG001", "TPM001")
+
+    optimizer.assignments = {}
+    assert optimizer.validate_assignment("PROG002", "TPM001")
+
+def test_get_available_tpms_matches_validation(sample_tpms, sample_programs):
+    """Test that the vectorized candidate mask agrees with validate_assignment"""
+    sample_tpms["TPM001"].available_time = 0.6
+    optimizer = BaseOptimizer(sample_tpms, sample_programs)
+    optimizer.assignments = {"PROG001": "TPM001"}
+
+    for prog_id in sample_programs:
+        assert optimizer.get_available_tpms(prog_id) == [
+            tpm_id for tpm_id in sample_tpms if optimizer.validate_assignment(prog_id, tpm_id)]
+
+def test_assignment_scores_vector(sample_tpms, sample_programs):
+    """Test that vectorized scores match the per-pair score"""
+    optimizer = BaseOptimizer(sample_tpms, sample_programs)
+    optimizer.assignments = {"PROG001": "TPM001"}
+
+    matrix = optimizer.calculate_assignment_score_matrix(list(sample_programs))
+    for column, prog_id in enumerate(sample_programs):
+        scores = optimizer.calculate_assignment_scores(prog_id)
+        expected = [optimizer.calculate_assignment_score(prog_id, tpm_id) for tpm_id in sample_tpms]
+        assert list(scores) == expected
+        assert list(matrix[:, column]) == expected
+
+
+def test_assignment_state(sample_tpms, sample_programs):
+    """Test that assignment_state follows the assignments dict without changing state"""
+    optimizer = BaseOptimizer(sample_tpms, sample_programs)
+    optimizer.assignments = {"PROG001": "TPM001", "PROG002": "TPM001"}
+    optimizer.assignments["PROG002"] = "TPM002"
+
+    prog_tpm, tz_diff, loads, portfolio_counts = optimizer.assignment_state()
+    assert list(prog_tpm) == [0, 1]
+    assert list(tz_diff) == [optimizer._tz_diff[0, 0], optimizer._tz_diff[1, 1]]
+    assert list(loads) == pytest.approx([0.3, 0.4])
+    assert list(portfolio_counts) == [1, 1]
+    assert list(optimizer._prog_tpm) == [0, 0]
+
+
+def test_timezone_matrices(sample_tpms, sample_programs):
+    """Test that the broadcast timezone matrices match the per-pair helpers"""
+    optimizer = BaseOptimizer(sample_tpms, sample_programs)
+
+    for t, tpm in enumerate(sample_tpms.values()):
+        for p, program in enumerate(sample_programs.values()):
+            assert optimizer._tz_diff[t, p] == timezone_difference(tpm.timezone, program.timezone)
+            assert optimizer._tz_score[t, p] == calculate_timezone_score(tpm.timezone, program)
+
+
+def test_non_dominated():
+    """Test the Pareto front mask of a metrics matrix"""
+    from src.tpm_optimizer.optimizers.solution import non_dominated
+    metrics = np.array([[0, 1, 2, 0],
+                        [1, 1, 2, 0],
+                        [1, 0, 2, 0],
+                        [0, 1, 2, 0]], dtype=np.float64)
+    assert list(non_dominated(metrics)) == [True, False, True, True]
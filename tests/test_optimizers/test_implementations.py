@@ -1,4 +1,6 @@
 import pytest
+from pulp import LpProblem
+from src.tpm_optimizer.models import TPM, Program, TPMConstraints
 from src.tpm_optimizer.optimizers import (
     MILPOptimizer,
     SimulatedAnnealingOptimizer,
@@ -18,6 +20,71 @@ def test_milp_optimizer(sample_tpms, sample_programs):
         assert all(tpm_id in sample_tpms for tpm_id in solution.values())
 
 
+def test_milp_optimizer_configured_solver(sample_tpms, sample_programs):
+    """Test that a configured PuLP solver is used as given"""
+    from pulp import PULP_CBC_CMD
+    solver = PULP_CBC_CMD(msg=False)
+    optimizer = MILPOptimizer(sample_tpms, sample_programs, solver=solver)
+
+    assert optimizer._solver() is solver
+    assert isinstance(optimizer.optimize(), dict)
+
+
+def _portfolio_instance(fixed_tpm=None):
+    """Two TPMs, where the first is desired by every program, and programs
+    from four portfolios that both could take"""
+    programs = {}
+    for i, portfolio in enumerate(["a", "a", "b", "c", "d"]):
+        programs[f"P{i}"] = Program(id=f"P{i}", name=f"Program {i}", timezone="UTC",
+                                    required_skills={"pm"}, required_time=0.15,
+                                    required_level=1, portfolio=portfolio,
+                                    fixed_tpm=fixed_tpm if i == 0 else None)
+    tpms = {tpm_id: TPM(id=tpm_id, name=tpm_id, timezone="UTC", skills={"pm"},
+                        available_time=1.0, level=3, conflicts=set(),
+                        desired_programs=set(programs) if tpm_id == "A" else set())
+            for tpm_id in ["A", "B"]}
+    return tpms, programs
+
+
+def _portfolios_by_tpm(programs, solution):
+    portfolios = {}
+    for prog_id, tpm_id in solution.items():
+        portfolios.setdefault(tpm_id, set()).add(programs[prog_id].portfolio)
+    return portfolios
+
+
+@pytest.mark.parametrize("fixed_tpm", [None, "A"])
+def test_milp_optimizer_portfolio_cap(fixed_tpm):
+    """Test that the MILP gives no TPM more than MAX_PORTFOLIOS portfolios,
+    counting those held by pre-assigned programs"""
+    tpms, programs = _portfolio_instance(fixed_tpm)
+    solution = MILPOptimizer(tpms, programs).optimize()
+
+    assert set(solution) == set(programs)
+    if fixed_tpm:
+        assert solution["P0"] == fixed_tpm
+    portfolios = _portfolios_by_tpm(programs, solution)
+    assert all(len(p) <= TPMConstraints.MAX_PORTFOLIOS for p in portfolios.values())
+
+
+def test_milp_optimizer_warm_start_portfolio_rows(monkeypatch):
+    """Test that the greedy warm start satisfies the portfolio rows"""
+    tpms, programs = _portfolio_instance("A")
+    solve = LpProblem.solve
+    checked = []
+
+    def check_and_solve(model, solver=None):
+        for constraint in model.constraints.values():
+            if any(var.name.startswith("portfolio") for var in constraint):
+                assert constraint.valid()
+                checked.append(constraint)
+        return solve(model, solver)
+
+    monkeypatch.setattr(LpProblem, "solve", check_and_solve)
+    MILPOptimizer(tpms, programs).optimize()
+    assert checked
+
+
 def test_simulated_annealing_optimizer(sample_tpms, sample_programs):
     """Test Simulated Annealing optimizer"""
     optimizer = SimulatedAnnealingOptimizer(sample_tpms, sample_programs)
@@ -48,4 +115,74 @@ def test_two_phase_optimizer(sample_tpms, sample_programs):
     assert isinstance(solution, dict)
     if solution:
         assert all(prog_id in sample_programs for prog_id in solution.keys())
-        assert all(tpm_id in sample_tpms for tpm_id in solution.values())
\ No newline at end of file
+        assert all(tpm_id in sample_tpms for tpm_id in solution.values())
+
+def test_hybrid_incremental_state(sample_tpms, sample_programs):
+    """Test that incremental moves keep the cached metrics exact"""
+    from src.tpm_optimizer.optimizers import _sa_kernel
+    optimizer = HybridOptimizer(sample_tpms, sample_programs)
+    arrays = optimizer._metric_arrays()
+    state = _sa_kernel.IncrementalState.build(
+        optimizer._to_index_array({"PROG001": "TPM001", "PROG002": "TPM001"}), *arrays)
+
+    _sa_kernel.move(state.assign, 1, 1, state.metrics, state.loads, state.used,
+                    state.portfolio_members, state.portfolio_counts, *arrays[:-1])
+    assert list(state.metrics) == list(_sa_kernel.evaluate_objectives(state.assign, *arrays))
+    assert list(state.loads) == pytest.approx([0.3, 0.4])
+
+
+def test_hybrid_neighbor_revert(sample_tpms, sample_programs):
+    """Test that reverting a neighbor move restores the state"""
+    from src.tpm_optimizer.optimizers import _sa_kernel
+    sample_programs["PROG001"].fixed_tpm = None
+    optimizer = HybridOptimizer(sample_tpms, sample_programs)
+    assign = optimizer._to_index_array({"PROG001": "TPM001", "PROG002": "TPM002"})
+    optimizer._prepare_moves(assign)
+    state = _sa_kernel.IncrementalState.build(assign, *optimizer._metric_arrays())
+    before = state.assign.copy(), state.metrics.copy(), state.loads.copy()
+
+    log = optimizer.get_neighbor(state)
+    optimizer.revert_neighbor(state, log)
+    assert list(state.assign) == list(before[0])
+    assert list(state.metrics) == list(before[1])
+    assert list(state.loads) == list(before[2])
+
+
+def test_hybrid_optimizer_seed(sample_tpms, sample_programs):
+    """Test that a seeded hybrid run is reproducible"""
+    first = HybridOptimizer(sample_tpms, sample_programs, seed=42).optimize()
+    second = HybridOptimizer(sample_tpms, sample_programs, seed=42).optimize()
+    assert first == second
+
+
+def test_simulated_annealing_incremental_score(sample_tpms, sample_programs):
+    """Test that the annealed score state matches a full recomputation"""
+    sample_programs["PROG001"].fixed_tpm = None
+    optimizer = SimulatedAnnealingOptimizer(sample_tpms, sample_programs, seed=3)
+    solution = {"PROG001": "TPM001", "PROG002": "TPM002"}
+    optimizer._init_score_state(solution)
+    assert optimizer._current_score() == pytest.approx(optimizer.calculate_solution_score(solution))
+
+    optimizer.optimize()
+    # Score against the empty state annealing started from, not the stored result
+    optimizer.assignments = {}
+    current = {optimizer._prog_ids[p]: optimizer._tpm_ids[optimizer._sa_assign[p]]
+               for p in optimizer._order}
+    assert optimizer._current_score() == pytest.approx(optimizer.calculate_solution_score(current))
+
+
+def test_simulated_annealing_seed(sample_tpms, sample_programs):
+    """Test that a seeded simulated annealing run is reproducible"""
+    first = SimulatedAnnealingOptimizer(sample_tpms, sample_programs, seed=7).optimize()
+    second = SimulatedAnnealingOptimizer(sample_tpms, sample_programs, seed=7).optimize()
+    assert first == second
+
+
+def test_two_phase_tracks_portfolios(sample_tpms, sample_programs):
+    """Test TwoPhase keeps per-TPM portfolio counts in sync with its moves"""
+    optimizer = TwoPhaseOptimizer(sample_tpms, sample_programs)
+    solution = optimizer.optimize()
+
+    expected = optimizer._calculate_tpm_portfolios(solution)
+    assert {t: c for t, c in optimizer._tpm_portfolios.items() if c} == \
+        {t: c for t, c in expected.items() if c}
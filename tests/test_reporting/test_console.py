@@ -0,0 +1,20 @@
+import pandas as pd
+from src.tpm_optimizer.reporting import print_assignment_report
+
+
+def test_print_assignment_report_rows(capsys):
+    """Test that tables are printed in full unless max_rows is given"""
+    assignments_df = pd.DataFrame({'Program ID': [f"PROG{i:03d}" for i in range(150)],
+                                   'Required Time': [0.5] * 150})
+    empty_df = pd.DataFrame()
+    metrics = {'Assignment Coverage': 100.0, 'Average Timezone Spread': 0.0,
+               'Average Portfolio Diversity': 1.0, 'Average TPM Utilization': 50.0,
+               'Timezone Respect Percentage': 100.0}
+
+    print_assignment_report(assignments_df, empty_df, empty_df, metrics, 150, 150)
+    output = capsys.readouterr().out
+    assert "PROG075" in output and "PROG149" in output
+
+    print_assignment_report(assignments_df, empty_df, empty_df, metrics, 150, 150, max_rows=10)
+    output = capsys.readouterr().out
+    assert "PROG075" not in output and "PROG149" in output
@@ -0,0 +1,23 @@
+import pytest
+from src.tpm_optimizer.optimizers import BaseOptimizer
+from src.tpm_optimizer.reporting import generate_assignment_report
+
+
+def test_report_follows_in_place_edits(sample_tpms, sample_programs):
+    """Test that the report reflects edits made directly to the assignments dict"""
+    optimizer = BaseOptimizer(sample_tpms, sample_programs)
+    optimizer.assignments = {"PROG001": "TPM001", "PROG002": "TPM001"}
+    optimizer.assignments["PROG002"] = "TPM002"
+    optimizer.assignments.pop("PROG001")
+
+    assignments_df, unassigned_df, utilization_df, metrics = generate_assignment_report(optimizer)
+
+    assert list(assignments_df['Program ID']) == ["PROG002"]
+    assert list(unassigned_df['Program ID']) == ["PROG001"]
+    utilization = utilization_df.set_index('TPM ID')
+    assert utilization.loc["TPM001", 'Program Count'] == 0
+    assert utilization.loc["TPM001", 'Used Capacity'] == 0
+    assert utilization.loc["TPM002", 'Program Count'] == 1
+    assert utilization.loc["TPM002", 'Used Capacity'] == pytest.approx(
+        round(sample_programs["PROG002"].required_time, 1))
+    assert metrics['Assignment Coverage'] == 50.0
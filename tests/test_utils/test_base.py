@@ -1,7 +1,11 @@
 import pytest
+import numpy as np
 from src.tpm_optimizer.utils import (
+    tz_to_utc_offset,
     timezone_difference,
     calculate_timezone_score,
+    calculate_level_score,
+    level_scores,
     DataValidator
 )
 from src.tpm_optimizer.models import TPM, Program
@@ -14,6 +18,14 @@ def test_timezone_difference():
     assert 8 <= diff <= 9  # Account for daylight savings
 
 
+def test_tz_to_utc_offset_fallbacks():
+    """Test that unknown and malformed zone names fall back to UTC"""
+    for name in ["America", "Europe", "US", "Asia", "Not/AZone", "", "../etc"]:
+        assert tz_to_utc_offset(name) == 0.0
+    assert tz_to_utc_offset("asia/singapore") == tz_to_utc_offset("Asia/Singapore") == 8.0
+    assert tz_to_utc_offset("utc") == 0.0
+
+
 def test_timezone_score():
     """Test timezone score calculation"""
     program = Program(
@@ -39,6 +51,23 @@ def test_timezone_score():
     assert score == 0.0  # More than 6 hours
 
 
+def test_level_score():
+    """Test level fit scores"""
+    assert calculate_level_score(3, 3) == 1.0
+    assert calculate_level_score(4, 3) == 0.7
+    assert calculate_level_score(5, 3) == 0.4
+    assert calculate_level_score(2, 3) == 0.0
+
+
+def test_level_scores_any_level():
+    """Test that vectorized level scores match the scalar ones outside 1-5 too"""
+    levels = np.arange(-2, 9)
+    scores = level_scores(levels[:, np.newaxis], levels[np.newaxis, :])
+    for i, tpm_level in enumerate(levels):
+        for j, required_level in enumerate(levels):
+            assert scores[i, j] == calculate_level_score(int(tpm_level), int(required_level))
+
+
 def test_data_validator():
     """Test data validation"""
     validator = DataValidator()
@@ -103,3 +132,22 @@ def test_timezone_handling_edge_cases():
     score = calculate_timezone_score("", program)
     # Should be equivalent to comparing with UTC
     assert score == calculate_timezone_score("UTC", program)
+
+
+def test_shorten_name():
+    """Test name abbreviation and truncation for report columns"""
+    from src.tpm_optimizer.reporting.formatter import shorten_name
+
+    # Names that fit are returned as is, even if they could be abbreviated
+    assert shorten_name("Machine Learning") == "Machine Learning"
+
+    # The longer phrase wins where phrases overlap
+    assert shorten_name("Technical Program Manager Onboarding Flow") == "TPM Onboarding Flow"
+    assert shorten_name("Portfolio Management for Technical Program Managers") == \
+        "Portfolio Mgmt for TPMs"
+
+    # Names still too long after abbreviating are truncated with an ellipsis
+    shortened = shorten_name("Machine Learning Platform Development Lifecycle Management Extra Words")
+    assert shortened == "ML Plat Dev LC Mgmt Extra W..."
+    assert len(shortened) == 30
+    assert shorten_name("x" * 40, max_length=10) == "xxxxxxx..."
@@ -1,5 +1,6 @@
 # tests/test_utils/test_loader.py
 import pytest
+import pandas as pd
 from src.tpm_optimizer.models import TPM, Program
 from src.tpm_optimizer.utils import load_data
 
@@ -16,4 +17,44 @@ def test_load_data(test_csv_files):
     assert len(programs) == 2
     assert isinstance(programs['PROG001'], Program)
     assert programs['PROG001'].name == "ML Pipeline"
-    assert programs['PROG001'].required_skills == {"project-management", "mlops"}
\ No newline at end of file
+    assert programs['PROG001'].required_skills == {"project-management", "mlops"}
+
+def test_load_data_reports_all_invalid_rows(test_csv_files):
+    """Test that invalid rows are all reported before any model is built"""
+    tpms_df = pd.read_csv(test_csv_files['tpms'])
+    tpms_df.loc[0, 'level'] = 7
+    tpms_df.to_csv(test_csv_files['tpms'], index=False)
+    programs_df = pd.read_csv(test_csv_files['programs'])
+    programs_df.loc[1, 'required_time'] = 0
+    programs_df.to_csv(test_csv_files['programs'], index=False)
+
+    with pytest.raises(ValueError) as excinfo:
+        load_data(test_csv_files['tpms'], test_csv_files['programs'])
+
+    assert "TPM TPM001: TPM level must be between 1 and 5" in str(excinfo.value)
+    assert "Program PROG002: Required time must be between 0 and 1" in str(excinfo.value)
+
+
+def test_load_data_keeps_text_values(tmp_path):
+    """Test that ids keep leading zeros, numeric ids stay text and empty set cells are empty"""
+    tpms_file = tmp_path / 'tpms.csv'
+    tpms_file.write_text(
+        "id,name,timezone,skills,available_time,level,conflicts,allow_overload,"
+        "fixed_program,desired_programs\n"
+        "001,Lead,UTC,pm,1.0,3,,false,,\n"
+        "1,Senior,UTC,,0.5,4,,false,007,\n")
+    programs_file = tmp_path / 'programs.csv'
+    programs_file.write_text(
+        "id,name,timezone,required_skills,required_time,required_level,fixed_tpm,"
+        "stakeholder_timezones,complexity_score,portfolio\n"
+        "007,Pipeline,UTC,pm,0.5,3,1,,2,platform\n")
+
+    tpms, programs = load_data(str(tpms_file), str(programs_file))
+
+    assert set(tpms) == {"001", "1"}
+    assert programs["007"].fixed_tpm == "1"
+    assert tpms["1"].fixed_program == "007"
+    assert tpms["1"].skills == set()
+    assert tpms["001"].conflicts == set()
+    assert tpms["001"].desired_programs == set()
+    assert programs["007"].stakeholder_timezones == set()
@@ -12,4 +12,56 @@ def test_data_validator(sample_tpms, sample_programs):
 
     # Test Program validation
     for program in sample_programs.values():
-        validator.validate_program(program)
\ No newline at end of file
+        validator.validate_program(program)
+
+def _columns(tpms, programs):
+    """Column-wise fields of model dicts, as load_data passes them"""
+    tpm_columns = {field: [getattr(tpm, field) for tpm in tpms.values()]
+                   for field in ['id', 'timezone', 'available_time', 'level']}
+    program_columns = {field: [getattr(p, field) for p in programs.values()]
+                       for field in ['id', 'timezone', 'required_time', 'required_level',
+                                     'complexity_score', 'fixed_tpm']}
+    return tpm_columns, program_columns
+
+
+def test_data_validator_collects_all_errors(sample_tpms, sample_programs):
+    """Test that collect_columns reports every problem instead of stopping at the first"""
+    assert DataValidator.collect_columns(*_columns(sample_tpms, sample_programs)) == []
+
+    sample_tpms["TPM001"].level = 7
+    sample_programs["PROG002"].required_time = 0
+    sample_programs["PROG002"].fixed_tpm = "TPM999"
+    errors = DataValidator.collect_columns(*_columns(sample_tpms, sample_programs))
+
+    assert errors == [
+        "TPM TPM001: TPM level must be between 1 and 5",
+        "Program PROG002: Required time must be between 0 and 1",
+        "Program PROG002: Fixed TPM does not exist",
+    ]
+
+
+def test_data_validator_validate_columns(sample_tpms, sample_programs):
+    """Test that validate_columns raises once listing every problem"""
+    DataValidator.validate_columns(*_columns(sample_tpms, sample_programs))
+
+    sample_tpms["TPM001"].available_time = 2
+    sample_programs["PROG002"].required_level = 0
+    with pytest.raises(ValueError) as excinfo:
+        DataValidator.validate_columns(*_columns(sample_tpms, sample_programs))
+
+    assert "TPM TPM001: Available time must be between 0 and 1" in str(excinfo.value)
+    assert "Program PROG002: Required level must be between 1 and 5" in str(excinfo.value)
+
+
+def test_data_validator_reports_duplicate_ids():
+    """Test that repeated TPM and program ids are reported after their first row"""
+    tpm_columns = {'id': ['T1', 'T2', 'T1'], 'timezone': ['UTC'] * 3,
+                   'available_time': [1.0] * 3, 'level': [3] * 3}
+    program_columns = {'id': ['P1', 'P1'], 'timezone': ['UTC'] * 2,
+                       'required_time': [0.5] * 2, 'required_level': [3] * 2,
+                       'complexity_score': [1] * 2, 'fixed_tpm': [None] * 2}
+
+    assert DataValidator.collect_columns(tpm_columns, program_columns) == [
+        "TPM T1: Duplicate TPM ID",
+        "Program P1: Duplicate program ID",
+    ]